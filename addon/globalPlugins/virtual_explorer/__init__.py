@@ -14,16 +14,71 @@ import gui
 import globalVars
 import api
 import tones
+import keyboardHandler
 import addonHandler
+import config
+import core
+from logHandler import log
 addonHandler.initTranslation()
 from scriptHandler import script, getLastScriptRepeatCount
 #Importamos librerías externas a NVDA
 import os
-import json
-import shutil
+import threading
+import time
 import wx
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from . import database
-from .dialog import pathsDialog
+from . import favoritesIO
+from . import fileIndex
+from . import fileOperations
+from . import folderSize
+from . import listing
+from . import typeAhead
+from .dialog import pathsDialog, filterDialog
+from .favorites import Favorite
+
+# Favorites validated together during an import, and threads used to check that their paths exist.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_CHECK_THREADS = 8
+
+# Seconds without typing after which type-ahead ends and plain keys reach the focused application again.
+TYPEAHEAD_TIMEOUT = 2.0
+
+# Items whose metadata had to be read from disk, kept so repeated queries are instant.
+METADATA_CACHE_ENTRIES = 256
+
+confspec = {
+	# Maximum number of folder listings kept in memory, 0 disables the cache.
+	"listingCacheEntries": "integer(default=32, min=0)",
+	# Approximate memory budget for cached listings, in megabytes.
+	"listingCacheMemoryMB": "integer(default=64, min=1)",
+	# Maximum number of folders listed ahead of time around the focused item, 0 disables prefetching.
+	"prefetchMaxPending": "integer(default=2, min=0)",
+	# Number of threads running paste operations in the background.
+	"fileOperationWorkers": "integer(default=1, min=1, max=4)",
+	# Seconds between progress announcements of a running paste.
+	"fileProgressInterval": "integer(default=5, min=1)",
+	# Number of files copied in parallel within a single paste.
+	"copyThreads": "integer(default=4, min=1, max=16)",
+	# Keep a searchable index of the file names under every favorite.
+	"fileIndexEnabled": "boolean(default=False)",
+	# Minutes between incremental refreshes of the file index, 0 disables the schedule.
+	"fileIndexInterval": "integer(default=30, min=0)",
+	# Database changes are committed together once no change happened for this many milliseconds...
+	"dbFlushDelay": "integer(default=1000, min=0)",
+	# ...or as soon as this many changes are pending.
+	"dbMaxPendingWrites": "integer(default=100, min=1)",
+	# Order of folder listings, see listing.SORT_MODES.
+	"listingSortMode": 'option("name", "modified", "size", "type", "foldersFirst", default="name")',
+	# Run every database query on a dedicated thread instead of NVDA's main thread.
+	"dbWorkerThread": "boolean(default=True)",
+	# Number of threads reading folders while calculating the size of a folder.
+	"folderSizeThreads": "integer(default=8, min=1, max=32)",
+	# Number of files, and of folders, shown by the largest items view.
+	"largestItemsCount": "integer(default=20, min=1, max=500)",
+}
+config.conf.spec["virtualExplorer"] = confspec
 
 def disableInSecureMode(decoratedCls):
 	"""
@@ -45,20 +100,53 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		Método de inicialización de la clase.
 		"""
 		super(GlobalPlugin, self).__init__()
+		start = time.perf_counter()
 
 		self.dbPath = os.path.join(globalVars.appArgs.configPath, "virtual_explorer.db")
-		self.db = database.database(self.dbPath)
-		self.db.migrate_schema()
-		self.db.create("paths", "path text not null, identifier text not null, fixed integer not null, category text")
-		
+		# The database is opened and the favorites are loaded on a background thread, see _initialize.
+		self.db = None
+		self.initialized = False
+		self._initEvent = threading.Event()
+		# Guards the hand-over of the database between _initialize and terminate, which may run at the same time.
+		self._initLock = threading.Lock()
+		self.terminated = False
+		self._initInfo = None
+		self._initError = None
+		self._initTimings = []
+
 		self.fav_paths = {}
+		# identifier -> (category, path_info), kept in sync by every mutation.
+		self.identifier_index = {}
 		self.categories = []
 		self.category_index = -1
 		self.navigation_stack = []
 		self.counters = []
+		# Sorted name index of each level, parallel to navigation_stack; None until (re)built.
+		self.prefix_indexes = []
+		self.typeahead_active = False
+		self.typeahead_prefix = ""
+		self.typeahead_time = 0
 		self.clipboard = None
 		self.clipboard_operation = None
 		self.context_item_path = None
+		# Directory listings run on this pool so slow folders never block NVDA.
+		self.listingExecutor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="virtualExplorerListing")
+		self.listingCache = listing.ListingCache(
+			config.conf["virtualExplorer"]["listingCacheEntries"],
+			config.conf["virtualExplorer"]["listingCacheMemoryMB"] * 1024 * 1024
+		)
+		self.fileOperations = fileOperations.FileOperationQueue(
+			onProgress=lambda job: wx.CallAfter(self._onFileJobProgress, job),
+			onFinished=lambda job: wx.CallAfter(self._onFileJobFinished, job),
+			workers=config.conf["virtualExplorer"]["fileOperationWorkers"],
+			progressInterval=config.conf["virtualExplorer"]["fileProgressInterval"],
+			copyThreads=config.conf["virtualExplorer"]["copyThreads"]
+		)
+		# path -> metadata of items outside folder listings (favorites, search results), least recently used first.
+		self.metadataCache = OrderedDict()
+		self.prefetcher = listing.Prefetcher(self.listingCache, config.conf["virtualExplorer"]["prefetchMaxPending"])
+		# Incremented whenever the user leaves the current level; pending listings compare against it.
+		self.navigation_token = 0
 
 		self.markers = {
 			"$users": os.path.expanduser('~'),
@@ -68,16 +156,97 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 			"$videos": os.path.join(os.path.expanduser('~'), "Videos"),
 			"$pictures": os.path.join(os.path.expanduser('~'), "Pictures")
 		}
-		self._loadInfo()
 		self.lastFixed = -1
 
+		self.fileIndex = fileIndex.FileIndex(os.path.join(globalVars.appArgs.configPath, "virtual_explorer_index.db"))
+		self.indexTimer = None
+		self.folderSizes = folderSize.FolderSizeCache(
+			os.path.join(globalVars.appArgs.configPath, "virtual_explorer_sizes.db"),
+			config.conf["virtualExplorer"]["folderSizeThreads"]
+		)
+		self.sizeJob = None
+		self._initThread = threading.Thread(target=self._initialize, name="virtualExplorerInit", daemon=True)
+		self._initThread.start()
+		log.info(f"Virtual explorer constructor took {(time.perf_counter() - start) * 1000:.1f} ms")
+
+	def _initialize(self):
+		"""
+		Abre la base de datos, aplica las migraciones y consulta las rutas favoritas en segundo plano, justo después del arranque de NVDA. El resultado se aplica en el hilo principal con _finishInitialization.
+		"""
+		try:
+			start = time.perf_counter()
+			db = database.database(self.dbPath, threaded=config.conf["virtualExplorer"]["dbWorkerThread"])
+			self._initTimings.append(("open database", time.perf_counter() - start))
+			start = time.perf_counter()
+			db.migrate_schema()
+			db.enableWriteBehind(
+				core.callLater,
+				config.conf["virtualExplorer"]["dbFlushDelay"],
+				config.conf["virtualExplorer"]["dbMaxPendingWrites"]
+			)
+			self._initTimings.append(("migrate schema", time.perf_counter() - start))
+			start = time.perf_counter()
+			self._initInfo = db.executeAsync("select * from paths")
+			self._initInfo.exception()
+			self._initTimings.append(("query favorites", time.perf_counter() - start))
+			with self._initLock:
+				if self.terminated:
+					# NVDA exited while the database was being opened.
+					db.close()
+					return
+				self.db = db
+		except Exception as e:
+			self._initError = e
+		finally:
+			self._initEvent.set()
+		wx.CallAfter(self._finishInitialization)
+
+	def _finishInitialization(self):
+		"""
+		Aplica en el hilo principal las rutas cargadas por _initialize. Solo hace algo la primera vez que se llama.
+		"""
+		if self.initialized or self.terminated or not self._initEvent.is_set():
+			return
+		self.initialized = True
+		if self._initError is not None:
+			log.error(f"Virtual explorer could not open its database: {self._initError}")
+			return
+		start = time.perf_counter()
+		self._applyInfo(self._initInfo)
+		self._initInfo = None
+		self._initTimings.append(("load favorites", time.perf_counter() - start))
+		if config.conf["virtualExplorer"]["fileIndexEnabled"]:
+			self._startIndexing(announce=False)
+		log.info("Virtual explorer initialized: " + ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self._initTimings))
+
+	def _ensureInitialized(self):
+		"""
+		Aplica la inicialización en segundo plano si ya terminó, sin esperarla. Devuelve False si aún no terminó o si falló.
+		"""
+		if not self.initialized:
+			self._finishInitialization()
+		return self.initialized and self.db is not None
+
 	@property
 	def empty(self):
 		return not self.navigation_stack or not self.navigation_stack[0]
 
 	def terminate(self):
-		self.db.commit()
-		self.db.close()
+		self.navigation_token += 1
+		self.listingExecutor.shutdown(wait=False)
+		self.prefetcher.shutdown()
+		self.fileOperations.shutdown()
+		self._stopIndexTimer()
+		self.fileIndex.close()
+		if self.sizeJob is not None:
+			self.sizeJob.cancel()
+		log.debug(f"Virtual explorer listing cache: {self.listingCache!r}")
+		# Not waiting for _initialize: if it is still running, it closes the database itself.
+		with self._initLock:
+			self.terminated = True
+			db = self.db
+		if db is not None:
+			db.close()
 
 	def _getCurrentItem(self):
 		if self.empty or self.counters[-1] < 0:
@@ -86,101 +255,212 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if not current_list or self.counters[-1] >= len(current_list):
 			return None, None
 		item = current_list[self.counters[-1]]
-		path = item[0] if isinstance(item, list) else item
+		path = item.path if isinstance(item, Favorite) else item
 		return item, path
 
-	def fix(self, path, identifier):
-		# Find the path to update its 'fixed' status in memory
-		found = False
-		for category, paths in self.fav_paths.items():
-			for i, path_info in enumerate(paths):
-				if path_info[1] == identifier:
-					# Update in-memory object
-					self.fav_paths[category][i][2] = 1
-					found = True
-					break
-			if found:
+	def _findPath(self, identifier):
+		"""
+		Devuelve la tupla (categoría, ruta) asociada al identificador, o (None, None) si no existe.
+		"""
+		return self.identifier_index.get(identifier, (None, None))
+
+	@staticmethod
+	def _sortKey(path_info):
+		# Pinned paths first, then by identifier.
+		return (not path_info.fixed, path_info.identifier)
+
+	def _insertSorted(self, category, path_info):
+		"""
+		Inserta la ruta en la lista de su categoría manteniendo el orden (fijadas primero, luego por identificador).
+		"""
+		paths = self.fav_paths.setdefault(category, [])
+		key = self._sortKey(path_info)
+		low, high = 0, len(paths)
+		while low < high:
+			mid = (low + high) // 2
+			if self._sortKey(paths[mid]) < key:
+				low = mid + 1
+			else:
+				high = mid
+		paths.insert(low, path_info)
+		self.identifier_index[path_info.identifier] = (category, path_info)
+		return low
+
+	def _removeEntry(self, category, path_info):
+		"""
+		Quita la ruta de la lista de su categoría y del índice. Las categorías que quedan vacías se eliminan.
+		"""
+		paths = self.fav_paths[category]
+		for i, entry in enumerate(paths):
+			if entry is path_info:
+				del paths[i]
 				break
-		
-		if not found:
+		self.identifier_index.pop(path_info.identifier, None)
+		if not paths:
+			del self.fav_paths[category]
+
+	def _rootFocus(self):
+		"""
+		Devuelve la ruta favorita enfocada en el primer nivel de navegación, si la hay.
+		"""
+		if self.empty or self.counters[0] < 0 or self.counters[0] >= len(self.navigation_stack[0]):
+			return None
+		return self.navigation_stack[0][self.counters[0]]
+
+	def _resetNavigation(self, root):
+		"""
+		Reinicia la pila de navegación con la lista indicada como primer nivel, descartando los listados pendientes.
+		"""
+		self.navigation_token += 1
+		for level in self.navigation_stack[1:]:
+			self._cancelLevel(level)
+		self.navigation_stack = [root]
+		self.counters = [-1]
+		self.prefix_indexes = [None]
+
+	def _pushLevel(self, level):
+		self.navigation_stack.append(level)
+		self.counters.append(-1)
+		self.prefix_indexes.append(None)
+
+	def _popLevel(self):
+		self._cancelLevel(self.navigation_stack.pop())
+		self.counters.pop()
+		self.prefix_indexes.pop()
+
+	@staticmethod
+	def _itemName(item):
+		return item.identifier if isinstance(item, Favorite) else os.path.basename(item)
+
+	def _buildPrefixIndex(self, level):
+		if isinstance(level, listing.DirectoryLevel):
+			return typeAhead.PrefixIndex(level.names)
+		return typeAhead.PrefixIndex([self._itemName(item) for item in level])
+
+	def _getPrefixIndex(self):
+		"""
+		Devuelve el índice de nombres del nivel actual, reconstruyéndolo solo si el nivel cambió desde que se creó (por ejemplo, al terminar de leerse una carpeta).
+		"""
+		level = self.navigation_stack[-1]
+		index = self.prefix_indexes[-1]
+		if index is None or len(index) != len(level):
+			index = self.prefix_indexes[-1] = self._buildPrefixIndex(level)
+		return index
+
+	@staticmethod
+	def _cancelLevel(level):
+		if isinstance(level, listing.DirectoryLevel):
+			level.cancelled = True
+
+	def _syncNavigation(self, focused=None):
+		"""
+		Actualiza la lista de categorías y el estado de navegación tras modificar fav_paths en memoria, conservando la posición del usuario siempre que sea posible.
+		"""
+		current_category = self.categories[self.category_index] if 0 <= self.category_index < len(self.categories) else None
+		self.categories = sorted(self.fav_paths.keys())
+		if not self.categories:
+			self.category_index = -1
+			self._resetNavigation([])
+			return
+		if current_category in self.fav_paths:
+			self.category_index = self.categories.index(current_category)
+			root = self.fav_paths[current_category]
+			if self.navigation_stack[0] is not root:
+				# The category list object was replaced (e.g. renamed), keep the deeper levels.
+				self.navigation_stack[0] = root
+			self.prefix_indexes[0] = None
+			if focused is not None:
+				for i, entry in enumerate(root):
+					if entry is focused:
+						self.counters[0] = i
+						break
+			self.counters[0] = min(self.counters[0], len(root) - 1)
+		else:
+			# The current category disappeared, move to the closest one.
+			self.category_index = min(max(self.category_index, 0), len(self.categories) - 1)
+			self._resetNavigation(self.fav_paths[self.categories[self.category_index]])
+
+	def fix(self, path, identifier):
+		category, path_info = self._findPath(identifier)
+		if path_info is None:
 			ui.message(_("No fue posible fijar la ruta."))
 			return False
 
 		# Update database
-		self.db.execute("update paths set fixed=? where identifier=?", (1, identifier))
-		self.db.commit()
-
-		# Reload everything to re-sort and ensure consistent state
-		self._loadInfo()
+		self.db.write("update paths set fixed=? where identifier=?", (1, identifier))
+
+		# Move the entry to its new sorted position
+		focused = self._rootFocus()
+		self._removeEntry(category, path_info)
+		path_info.fixed = 1
+		self._insertSorted(category, path_info)
+		self._syncNavigation(focused)
 		ui.message(_("Ruta fijada."))
 		return True
 
 	def unfix(self, path, identifier):
-		# Find the path to update its 'fixed' status in memory
-		found = False
-		for category, paths in self.fav_paths.items():
-			for i, path_info in enumerate(paths):
-				if path_info[1] == identifier:
-					# Update in-memory object
-					self.fav_paths[category][i][2] = 0
-					found = True
-					break
-			if found:
-				break
-		
-		if not found:
+		category, path_info = self._findPath(identifier)
+		if path_info is None:
 			ui.message(_("No fue posible desfijar la ruta."))
 			return False
 
 		# Update database
-		self.db.execute("update paths set fixed=? where identifier=?", (0, identifier))
-		self.db.commit()
-
-		# Reload everything to re-sort and ensure consistent state
-		self._loadInfo()
+		self.db.write("update paths set fixed=? where identifier=?", (0, identifier))
+
+		# Move the entry to its new sorted position
+		focused = self._rootFocus()
+		self._removeEntry(category, path_info)
+		path_info.fixed = 0
+		self._insertSorted(category, path_info)
+		self._syncNavigation(focused)
 		ui.message(_("Ruta desfijada."))
 		return True
 
-	def _loadInfo(self):
+	def _loadInfo(self, onLoaded=None):
+		"""
+		Carga las rutas desde la base de datos. La consulta se hace en el hilo de la base de datos y el resultado se aplica después en el hilo principal, donde al final se llama a onLoaded.
+		"""
+		self.db.executeAsync("select * from paths", callback=lambda future: wx.CallAfter(self._applyInfo, future, onLoaded))
+
+	def _applyInfo(self, future, onLoaded=None):
 		try:
-			results = self.db.execute("select * from paths")
-			paths = [list(result) for result in results]
+			paths = [Favorite.fromRow(result) for result in future.result() or ()]
 			
 			# Group paths by category
 			self.fav_paths = {}
+			self.identifier_index = {}
 			for path_info in paths:
-				category = path_info[3] if path_info[3] else _("General")
+				category = path_info.category if path_info.category else _("General")
 				if category not in self.fav_paths:
 					self.fav_paths[category] = []
 				self.fav_paths[category].append(path_info)
+				self.identifier_index[path_info.identifier] = (category, path_info)
 
 			# Sort paths within each category
-			for category, path_list in self.fav_paths.items():
-				finalPaths = sorted([p for p in path_list if p[2] == 1], key=lambda x: x[1])
-				otherPaths = sorted([p for p in path_list if p[2] == 0], key=lambda x: x[1])
-				self.fav_paths[category] = finalPaths + otherPaths
+			for path_list in self.fav_paths.values():
+				path_list.sort(key=self._sortKey)
 
 			# Handle navigation state
 			self.categories = sorted(list(self.fav_paths.keys()))
 			self.category_index = -1
 			
 			if not self.categories:
-				self.navigation_stack = [[]]
-				self.counters = [-1]
+				self._resetNavigation([])
 			else:
 				self.category_index = 0
 				current_category_name = self.categories[self.category_index]
-				self.navigation_stack = [self.fav_paths[current_category_name]]
-				self.counters = [-1]
+				self._resetNavigation(self.fav_paths[current_category_name])
 			
 			self.lastFixed = -1 # This needs to be re-evaluated.
 		except Exception as e:
 			ui.message(_("Ha ocurrido un error al obtener las rutas: {}").format(e))
+			return
+		if onLoaded:
+			onLoaded()
 
 	def addPath(self, path, identifier, category=None, fixed=0):
 		# Check if identifier exists in any category
-		all_identifiers = [item[1] for cat_paths in self.fav_paths.values() for item in cat_paths]
-		if identifier in all_identifiers:
+		if identifier in self.identifier_index:
 			ui.message(_("Imposible añadir la ruta, el identificador ya está en uso."))
 			return False
 
@@ -192,48 +472,29 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if not category:
 			category = _("General")
 
-		# Add to in-memory dictionary
-		if category not in self.fav_paths:
-			self.fav_paths[category] = []
-			self.categories = sorted(list(self.fav_paths.keys())) # Update categories list
-
-		new_path_info = [path, identifier, fixed, category]
-		self.fav_paths[category].append(new_path_info)
-		# We should also sort the list here to maintain order
-		# For now, let's just append. Sorting can be complex with fixed paths.
-
 		# Add to database
-		self.db.execute("insert into paths(path, identifier, fixed, category) values(?, ?, ?, ?)", (path, identifier, fixed, category))
-		self.db.commit()
+		self.db.write("insert into paths(path, identifier, fixed, category) values(?, ?, ?, ?)", (path, identifier, fixed, category))
+
+		# Add to in-memory dictionary
+		focused = self._rootFocus()
+		self._insertSorted(category, Favorite(path, identifier, fixed, category))
+		self._syncNavigation(focused)
 		
 		tones.beep(432, 300)
 		ui.message(_("Ruta añadida correctamente."))
 		return True
 
 	def deletePath(self, identifier):
-		found_category = None
-		path_index = -1
-
-		# Find the path and its category
-		for category, paths in self.fav_paths.items():
-			for i, path_info in enumerate(paths):
-				if path_info[1] == identifier:
-					found_category = category
-					path_index = i
-					break
-			if found_category:
-				break
-
-		if not found_category:
+		found_category, path_info = self._findPath(identifier)
+		if path_info is None:
 			return False
 
 		# Delete from database first
-		self.db.execute("delete from paths where identifier=?", (identifier,))
-		self.db.commit()
+		self.db.write("delete from paths where identifier=?", (identifier,))
 
-		# Reload info to reflect changes and ensure consistent state
-		self._loadInfo()
-		
+		focused = self._rootFocus()
+		self._removeEntry(found_category, path_info)
+		self._syncNavigation(None if focused is path_info else focused)
 		return True
 
 	def renamePath(self, old_identifier, new_identifier):
@@ -241,34 +502,23 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if not new_identifier:
 			ui.message(_("El nuevo identificador no puede estar vacío."))
 			return False
-		all_identifiers = [item[1] for cat_paths in self.fav_paths.values() for item in cat_paths]
-		if new_identifier in all_identifiers:
+		if new_identifier in self.identifier_index:
 			ui.message(_("El nuevo identificador ya está en uso."))
 			return False
 
-		found_category = None
-		path_index = -1
-
-		# Find the path and its category
-		for category, paths in self.fav_paths.items():
-			for i, path_info in enumerate(paths):
-				if path_info[1] == old_identifier:
-					found_category = category
-					path_index = i
-					break
-			if found_category:
-				break
-
-		if not found_category:
+		found_category, path_info = self._findPath(old_identifier)
+		if path_info is None:
 			return False
 
-		# Update in-memory dictionary
-		self.fav_paths[found_category][path_index][1] = new_identifier
-
 		# Update database
-		self.db.execute("update paths set identifier=? where identifier=?", (new_identifier, old_identifier))
-		self.db.commit()
-
+		self.db.write("update paths set identifier=? where identifier=?", (new_identifier, old_identifier))
+
+		# Update in-memory dictionary and its index, moving the entry to its new sorted position
+		focused = self._rootFocus()
+		self._removeEntry(found_category, path_info)
+		path_info.identifier = new_identifier
+		self._insertSorted(found_category, path_info)
+		self._syncNavigation(focused)
 		return True
 
 	def renameCategory(self, old_category, new_category):
@@ -278,15 +528,70 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if new_category in self.categories:
 			ui.message(_("La categoría ya existe."))
 			return False
+		if old_category not in self.fav_paths:
+			return False
 
-		# Update database
-		self.db.execute("update paths set category=? where category=?", (new_category, old_category))
-		self.db.commit()
-
-		# Reload info
-		self._loadInfo()
+		# Update database; paths without a category are shown under "General"
+		if old_category == _("General"):
+			self.db.write("update paths set category=? where category=? or category is null", (new_category, old_category))
+		else:
+			self.db.write("update paths set category=? where category=?", (new_category, old_category))
+
+		# Move the category list under its new name; its order does not change
+		paths = self.fav_paths.pop(old_category)
+		for path_info in paths:
+			path_info.category = new_category
+			self.identifier_index[path_info.identifier] = (new_category, path_info)
+		self.fav_paths[new_category] = paths
+		was_current = 0 <= self.category_index < len(self.categories) and self.categories[self.category_index] == old_category
+		self.categories = sorted(self.fav_paths.keys())
+		if was_current:
+			self.category_index = self.categories.index(new_category)
+		else:
+			self._syncNavigation(self._rootFocus())
 		return True
 
+	def importPaths(self, filePath, onLoaded=None):
+		"""
+		Importa rutas desde un archivo JSON Lines o CSV. Se validan por bloques y se insertan en una sola transacción; al final se recarga la información una única vez y se llama a onLoaded. Devuelve (añadidas, omitidas).
+		"""
+		read = 0
+		seen = set(self.identifier_index)
+		rows = []
+		batch = []
+		with ThreadPoolExecutor(max_workers=IMPORT_CHECK_THREADS) as executor:
+			def validateBatch():
+				# Existence checks run in parallel since favorites often live on network shares.
+				exists = executor.map(os.path.exists, [row[0] for row in batch])
+				rows.extend(row for row, rowExists in zip(batch, exists) if rowExists)
+				batch.clear()
+
+			for path, identifier, fixed, category in favoritesIO.readFavorites(filePath):
+				read += 1
+				if not path or not identifier or identifier in seen:
+					continue
+				seen.add(identifier)
+				batch.append((self.checkPath(path), identifier, fixed, category or _("General")))
+				if len(batch) >= IMPORT_BATCH_SIZE:
+					validateBatch()
+			validateBatch()
+		if rows:
+			self.db.write("insert into paths(path, identifier, fixed, category) values(?, ?, ?, ?)", rows, many=True)
+			self.db.submit(self.db.flush)
+			self._loadInfo(onLoaded)
+		return len(rows), read - len(rows)
+
+	def exportPaths(self, filePath):
+		"""
+		Exporta todas las rutas favoritas a un archivo JSON Lines o CSV, según su extensión. Devuelve el número de rutas exportadas.
+		"""
+		rows = (
+			(path_info.path, path_info.identifier, path_info.fixed, category)
+			for category in self.categories
+			for path_info in self.fav_paths[category]
+		)
+		return favoritesIO.writeFavorites(filePath, rows)
+
 	def checkPath(self, path):
 		newPath = self._checkMarkers(path)
 		return newPath if newPath is not None else path
@@ -297,6 +602,14 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 				return path.replace(key, value, 1)
 		return None
 
+	SORT_MODE_NAMES = {
+		"name": _("Ordenar por nombre"),
+		"modified": _("Ordenar por fecha de modificación"),
+		"size": _("Ordenar por tamaño"),
+		"type": _("Ordenar por tipo"),
+		"foldersFirst": _("Carpetas primero"),
+	}
+
 	ACTION_COPY = _("Copiar")
 	ACTION_CUT = _("Cortar")
 	ACTION_PASTE = _("Pegar")
@@ -336,35 +649,113 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 			dest_dir = os.path.dirname(dest_dir)
 
 		source_path = self.clipboard
+		if fileOperations.isInside(dest_dir, source_path):
+			ui.message(_("No se puede pegar una carpeta dentro de sí misma."))
+			return
 		dest_path = os.path.join(dest_dir, os.path.basename(source_path))
+		operation = fileOperations.CUT if self.clipboard_operation == "cut" else fileOperations.COPY
+		# A cut stays on the clipboard until the move succeeds, see _onFileJobFinished.
+		self.fileOperations.submit(fileOperations.FileJob(operation, source_path, dest_path))
+		# Exit actions menu while the operation runs in the background
+		self.script_exitDirectory(None)
+		ui.message(_("Pegando en segundo plano..."))
+
+	def _onFileJobProgress(self, job):
+		if job.totalBytes:
+			ui.message(_("{}%: {} de {} archivos, {} de {}").format(
+				job.copiedBytes * 100 // job.totalBytes,
+				job.copiedFiles, job.totalFiles,
+				fileOperations.formatSize(job.copiedBytes), fileOperations.formatSize(job.totalBytes)
+			))
+		else:
+			ui.message(_("{} de {} archivos").format(job.copiedFiles, job.totalFiles))
 
-		try:
-			if self.clipboard_operation == "copy":
-				if os.path.isdir(source_path):
-					shutil.copytree(source_path, dest_path)
-				else:
-					shutil.copy(source_path, dest_path)
-				ui.message(_("Elemento pegado."))
-			elif self.clipboard_operation == "cut":
-				shutil.move(source_path, dest_path)
-				ui.message(_("Elemento movido."))
+	def _onFileJobFinished(self, job):
+		"""
+		Se ejecuta en el hilo principal al terminar una operación de archivo: anuncia el resultado y actualiza el listado de destino.
+		"""
+		dest_dir = os.path.dirname(job.destination)
+		self.listingCache.invalidate(dest_dir)
+		if job.operation == fileOperations.CUT:
+			self.listingCache.invalidate(os.path.dirname(job.source))
+		if job.status == fileOperations.FileJob.CANCELLED:
+			ui.message(_("Operación cancelada: {}").format(os.path.basename(job.source)))
+			return
+		if job.status == fileOperations.FileJob.FAILED:
+			if isinstance(job.error, FileExistsError):
+				ui.message(_("Ya existe un elemento llamado {} en el destino.").format(os.path.basename(job.destination)))
+			else:
+				ui.message(_("Error al pegar: {}").format(job.error))
+			return
+		if job.operation == fileOperations.CUT:
+			if self.clipboard_operation == "cut" and self.clipboard == job.source:
 				self.clipboard = None
 				self.clipboard_operation = None
+			ui.message(_("Elemento movido."))
+		else:
+			ui.message(_("Elemento pegado."))
+		self._refreshLevel(dest_dir, job.destination)
 
-			# Exit actions menu and refresh parent
-			self.script_exitDirectory(None)
-			# Refresh the view of the directory we pasted into
-			new_content = [os.path.join(dest_dir, f) for f in os.listdir(dest_dir)]
-			self.navigation_stack[-1] = new_content
-			# Try to set focus on the new item
-			try:
-				self.counters[-1] = new_content.index(dest_path)
-				self.script_nextPath(None) # Announce
-			except (ValueError, IndexError):
-				pass
+	def _refreshLevel(self, path, focus_path=None, announce=True):
+		"""
+		Vuelve a listar en segundo plano el nivel actual si corresponde a la carpeta indicada; _onLevelRefreshed lo reemplaza al terminar, enfocando focus_path cuando es posible.
+		"""
+		if self._is_actions_menu() or len(self.navigation_stack) < 2:
+			return
+		current = self.navigation_stack[-1]
+		if not isinstance(current, listing.DirectoryLevel) or os.path.normcase(current.path) != os.path.normcase(path):
+			return
+		self.listingExecutor.submit(self._scanRefresh, current, focus_path, announce)
 
-		except Exception as e:
-			ui.message(_("Error al pegar: {}").format(e))
+	def _scanRefresh(self, current, focus_path, announce):
+		"""
+		Se ejecuta en un hilo del pool: lista de nuevo la carpeta del nivel con su filtro y la ordena.
+		"""
+		level = listing.DirectoryLevel(current.path, current.filter)
+		try:
+			items = listing.listDirectory(current.path, self.listingCache, current.filter)
+			level.extend(items)
+			level.setOrder(items.sortedOrder(config.conf["virtualExplorer"]["listingSortMode"]))
+		except OSError as e:
+			wx.CallAfter(ui.message, _("Error: {}").format(e))
+			return
+		wx.CallAfter(self._onLevelRefreshed, current, level, focus_path, announce)
+
+	def _onLevelRefreshed(self, current, level, focus_path, announce):
+		# Nothing to do if the user left the folder while it was read again.
+		if not self.navigation_stack or self.navigation_stack[-1] is not current:
+			return
+		level.complete = level.pushed = True
+		self._cancelLevel(current)
+		self.navigation_stack[-1] = level
+		# Rebuilt on the next type-ahead search.
+		self.prefix_indexes[-1] = None
+		try:
+			self.counters[-1] = level.index(focus_path)
+			if announce:
+				self._announceCurrentItem()
+		except ValueError:
+			self.counters[-1] = min(self.counters[-1], len(level) - 1)
+
+	def _applyOrder(self, level, order):
+		"""
+		Cambia el orden de un nivel ya mostrado conservando el elemento enfocado.
+		"""
+		if not level.pushed:
+			level.setOrder(order)
+			return
+		for depth, stacked in enumerate(self.navigation_stack):
+			if stacked is level:
+				break
+		else:
+			return
+		counter = self.counters[depth]
+		focused = level._position(counter) if 0 <= counter < len(level) else None
+		if not level.setOrder(order):
+			return
+		if focused is not None:
+			self.counters[depth] = level.displayIndex(focused)
+		self.prefix_indexes[depth] = None
 
 	def _copy_path(self):
 		if not self.context_item_path:
@@ -388,10 +779,124 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if self.clipboard:
 			actions.append(self.ACTION_PASTE)
 
-		self.navigation_stack.append(actions)
-		self.counters.append(-1)
+		self._pushLevel(actions)
 		self.script_nextPath(gesture)
 
+	@script(description=_("Anuncia el progreso de las operaciones de archivo en curso"), gesture="kb:alt+NVDA+p")
+	def script_reportFileOperations(self, gesture):
+		jobs = self.fileOperations.jobs
+		if not jobs:
+			ui.message(_("No hay operaciones en curso."))
+			return
+		if len(jobs) > 1:
+			ui.message(_("{} operaciones en cola").format(len(jobs)))
+		self._onFileJobProgress(jobs[0])
+
+	@script(description=_("Cancela las operaciones de archivo en curso"), gesture="kb:alt+NVDA+x")
+	def script_cancelFileOperations(self, gesture):
+		if not self.fileOperations.cancelAll():
+			ui.message(_("No hay operaciones en curso."))
+			return
+		ui.message(_("Cancelando..."))
+
+	def _favoriteRoots(self):
+		return [path_info.path for paths in self.fav_paths.values() for path_info in paths]
+
+	def _startIndexing(self, announce=True, full=False):
+		self._stopIndexTimer()
+		started = self.fileIndex.refresh(
+			self._favoriteRoots(),
+			onFinished=lambda index: wx.CallAfter(self._onIndexingFinished, index, announce),
+			full=full
+		)
+		if announce:
+			ui.message(_("Indexando archivos en segundo plano...") if started else _("La indexación ya está en curso."))
+
+	def _onIndexingFinished(self, index, announce):
+		log.debug(f"Virtual explorer file index refreshed: {index.stats!r}")
+		if index.error is not None:
+			log.error(f"Virtual explorer file index failed: {index.error}")
+			ui.message(_("Error al indexar los archivos: {}").format(index.error))
+		elif announce:
+			ui.message(_("Indexación terminada: {} elementos.").format(index.indexedEntries))
+		self._scheduleIndexRefresh()
+
+	def _scheduleIndexRefresh(self):
+		self._stopIndexTimer()
+		interval = config.conf["virtualExplorer"]["fileIndexInterval"]
+		if config.conf["virtualExplorer"]["fileIndexEnabled"] and interval > 0:
+			self.indexTimer = core.callLater(interval * 60 * 1000, self._startIndexing, announce=False)
+
+	def _stopIndexTimer(self):
+		if self.indexTimer is not None:
+			self.indexTimer.Stop()
+			self.indexTimer = None
+
+	@script(description=_("Activa o desactiva el índice de archivos de las rutas favoritas"), gesture="kb:alt+NVDA+shift+f")
+	def script_toggleFileIndex(self, gesture):
+		enabled = not config.conf["virtualExplorer"]["fileIndexEnabled"]
+		config.conf["virtualExplorer"]["fileIndexEnabled"] = enabled
+		if enabled:
+			ui.message(_("Índice de archivos activado."))
+			self._startIndexing()
+		else:
+			self._stopIndexTimer()
+			self.fileIndex.cancel()
+			ui.message(_("Índice de archivos desactivado."))
+
+	@script(description=_("Vuelve a construir desde cero el índice de archivos de las rutas favoritas"))
+	def script_rebuildFileIndex(self, gesture):
+		if not config.conf["virtualExplorer"]["fileIndexEnabled"]:
+			ui.message(_("El índice de archivos está desactivado. Pulsa alt+nvda+shift+f para activarlo."))
+			return
+		self._startIndexing(full=True)
+
+	@script(description=_("Busca archivos por nombre en el índice de las rutas favoritas"), gesture="kb:alt+NVDA+f")
+	def script_searchFiles(self, gesture):
+		if not config.conf["virtualExplorer"]["fileIndexEnabled"]:
+			ui.message(_("El índice de archivos está desactivado. Pulsa alt+nvda+shift+f para activarlo."))
+			return
+		if self._is_actions_menu():
+			ui.message(_("No puedes buscar mientras estás en el menú de acciones. Pulsa alt+nvda+retroceso para salir."))
+			return
+		wx.CallAfter(self._showSearchDialog)
+
+	def _showSearchDialog(self):
+		gui.mainFrame.prePopup()
+		with wx.TextEntryDialog(gui.mainFrame, _("Texto a buscar en los nombres de archivo:"), _("Buscar archivos")) as dialog:
+			result = dialog.ShowModal()
+			text = dialog.GetValue()
+		gui.mainFrame.postPopup()
+		if result != wx.ID_OK or not text.strip():
+			return
+		self.listingExecutor.submit(self._runSearch, text, self.navigation_token)
+
+	def _runSearch(self, text, token):
+		"""
+		Se ejecuta en un hilo del pool: consulta el índice y entrega los resultados al hilo principal.
+		"""
+		try:
+			results = self.fileIndex.search(text)
+		except database.sqlite3.Error as e:
+			wx.CallAfter(ui.message, _("Error al buscar: {}").format(e))
+			return
+		wx.CallAfter(self._onSearchFinished, text, results, token)
+
+	def _onSearchFinished(self, text, results, token):
+		# The user moved somewhere else while the search ran.
+		if token != self.navigation_token or self._is_actions_menu():
+			return
+		if not results:
+			ui.message(_("Sin resultados para {}").format(text))
+			return
+		if self.fileIndex.running:
+			ui.message(_("{} resultados; la indexación aún no termina.").format(len(results)))
+		else:
+			ui.message(_("{} resultados").format(len(results)))
+		self.navigation_token += 1
+		self._pushLevel(results)
+		self.script_nextPath(None)
+
 	@script(description=_("Abre el diálogo para ingresar nuevas rutas"), gesture="kb:alt+NVDA+a")
 	def script_addNewPath(self, gesture):
 		dialog = pathsDialog(gui.mainFrame, self)
@@ -400,6 +905,10 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		dialog.CentreOnScreen()
 		gui.mainFrame.postPopup()
 
+	@script(description=_("Recarga las rutas favoritas desde la base de datos"), gesture="kb:alt+NVDA+f5")
+	def script_reloadPaths(self, gesture):
+		self._loadInfo(lambda: ui.message(_("Rutas recargadas.")))
+
 	@script(description=_("Entra en el directorio seleccionado o abre el archivo"), gesture="kb:alt+NVDA+l")
 	def script_enterDirectory(self, gesture):
 		if self._is_actions_menu():
@@ -418,30 +927,106 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if not path:
 			return
 
-		if os.path.isdir(path):
-			try:
-				content = [os.path.join(path, f) for f in os.listdir(path)]
-				if not content:
-					ui.message(_("Carpeta vacía"))
-					return
-				self.navigation_stack.append(content)
-				self.counters.append(-1)
-				self.script_nextPath(gesture)
-			except PermissionError:
-				ui.message(_("Acceso denegado"))
-			except Exception as e:
-				ui.message(_("Error: {}").format(e))
+		if self._isDirectory(path):
+			self.prefetcher.cancel()
+			self.navigation_token += 1
+			token = self.navigation_token
+			level = listing.DirectoryLevel(path)
+			self.listingExecutor.submit(self._scanLevel, level, token)
+			# Only announce loading when the first entries are not almost immediate.
+			core.callLater(200, self._announceLoading, token, level)
 		else:
 			try:
 				os.startfile(path)
 			except Exception as e:
 				ui.message(_("Error: {}").format(e))
 
+	def _scanLevel(self, level, token):
+		"""
+		Se ejecuta en un hilo del pool: recorre la carpeta por bloques y los entrega al hilo principal a medida que están listos.
+		"""
+		mode = config.conf["virtualExplorer"]["listingSortMode"]
+		try:
+			# Filtered listings skip the cache, which only keeps complete folders.
+			# Sizes and dates of a cached listing are only trusted for a short while when they decide the order.
+			maxAge = listing.STAT_MAX_AGE if mode in ("modified", "size") else None
+			cached = self.listingCache.get(level.path, maxAge) if level.filter is None else None
+			if cached is not None:
+				# Evicted in the meantime: treated as too old to trust its sizes and dates.
+				level.cachedAt = self.listingCache.storedAt(level.path) or 0.0
+				# An empty folder is never pushed; _onLevelComplete announces it.
+				if len(cached):
+					wx.CallAfter(self._onLevelChunk, token, level, cached, True, cached.sortedOrder(mode))
+			else:
+				mtime = self.listingCache.getMtime(level.path)
+				items = listing.Entries()
+				for chunk, last in listing.iterChunks(level.path, entryFilter=level.filter):
+					if level.cancelled:
+						return
+					items.extend(chunk)
+					if not last:
+						wx.CallAfter(self._onLevelChunk, token, level, chunk)
+						continue
+					# Sorted here, off the main thread; the order is kept with the cached listing.
+					order = items.sortedOrder(mode)
+					if level.filter is None:
+						self.listingCache.put(level.path, mtime, items)
+					# Delivered with its order, so a folder read in one chunk is first announced complete and sorted.
+					wx.CallAfter(self._onLevelChunk, token, level, chunk, True, order)
+		except Exception as e:
+			wx.CallAfter(self._onLevelComplete, token, level, e)
+		else:
+			wx.CallAfter(self._onLevelComplete, token, level, None)
+
+	def _announceLoading(self, token, level):
+		if token == self.navigation_token and not level.pushed and not level.complete:
+			ui.message(_("Cargando..."))
+
+	def _onLevelChunk(self, token, level, chunk, last=False, order=None):
+		level.extend(chunk)
+		if last:
+			level.complete = True
+			if order is not None:
+				# Keeps the focus if earlier chunks are already shown.
+				self._applyOrder(level, order)
+		if level.pushed:
+			return
+		# The level is not on the stack yet; drop it if the user already moved away.
+		if token != self.navigation_token:
+			level.cancelled = True
+			return
+		level.pushed = True
+		if level.replaces is not None and self.navigation_stack and self.navigation_stack[-1] is level.replaces:
+			# A new filter for the current folder: swap the level in place.
+			self._cancelLevel(level.replaces)
+			self.navigation_stack[-1] = level
+			self.counters[-1] = -1
+			self.prefix_indexes[-1] = None
+			ui.message(_("Filtro aplicado.") if level.filter is not None else _("Filtro quitado."))
+		else:
+			self._pushLevel(level)
+		level.replaces = None
+		self.script_nextPath(None)
+
+	def _onLevelComplete(self, token, level, error):
+		level.complete = True
+		if level.pushed or token != self.navigation_token:
+			return
+		if isinstance(error, PermissionError):
+			ui.message(_("Acceso denegado"))
+		elif error is not None:
+			ui.message(_("Error: {}").format(error))
+		elif level.filter is not None:
+			# The previous view of the folder is kept.
+			ui.message(_("Ningún elemento coincide con el filtro"))
+		else:
+			ui.message(_("Carpeta vacía"))
+
 	@script(description=_("Vuelve al directorio anterior"), gesture="kb:alt+NVDA+backspace")
 	def script_exitDirectory(self, gesture):
+		self.navigation_token += 1
 		if len(self.navigation_stack) > 1:
-			self.navigation_stack.pop()
-			self.counters.pop()
+			self._popLevel()
 			item, path = self._getCurrentItem()
 			identifier = os.path.basename(path) if path else _("Explorador virtual")
 			ui.message(identifier)
@@ -472,8 +1057,8 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 			return
 		
 		item, path = self._getCurrentItem()
-		if item and isinstance(item, list):
-			identifier = item[1]
+		if item and isinstance(item, Favorite):
+			identifier = item.identifier
 			if self.deletePath(identifier):
 				ui.message(_("Ruta {} eliminada").format(identifier))
 			else:
@@ -493,9 +1078,7 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if self.counters[-1] < 0:
 			self.counters[-1] = len(current_level_list) - 1
 		
-		item, path = self._getCurrentItem()
-		identifier = item[1] if isinstance(item, list) else os.path.basename(path)
-		ui.message(_("{} {} de {}").format(identifier, self.counters[-1] + 1, len(current_level_list)))
+		self._announceCurrentItem()
 
 	@script(description=_("Va al siguiente elemento"), gesture="kb:alt+NVDA+k")
 	def script_nextPath(self, gesture):
@@ -507,13 +1090,315 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		if not current_level_list:
 			return
 
+		if self.counters[-1] + 1 >= len(current_level_list) and self._isLoading(current_level_list):
+			# Do not wrap around while the rest of the folder is still being read.
+			ui.message(_("Cargando más elementos..."))
+			return
 		self.counters[-1] += 1
 		if self.counters[-1] >= len(current_level_list):
 			self.counters[-1] = 0
 		
+		self._announceCurrentItem()
+
+	def _isDirectory(self, path):
+		"""
+		Indica si la ruta enfocada es una carpeta, usando el tipo guardado al listar el nivel en lugar de consultar el disco.
+		"""
+		level = self.navigation_stack[-1]
+		if isinstance(level, (listing.DirectoryLevel, folderSize.LargestItems)) and 0 <= self.counters[-1] < len(level):
+			return level.isDirectory(self.counters[-1])
+		return os.path.isdir(path)
+
+	@script(description=_("Anuncia el tipo, el tamaño y la fecha de modificación del elemento actual"), gesture="kb:alt+NVDA+i")
+	def script_announceMetadata(self, gesture):
+		if self._is_actions_menu():
+			return
+		item, path = self._getCurrentItem()
+		if not path:
+			return
+		level = self.navigation_stack[-1]
+		if isinstance(level, listing.DirectoryLevel):
+			if level.hasFreshStats():
+				# Folder entries carry the data read by scandir, for this visit or shortly before.
+				self._announceMetadata(path, level.metadata(self.counters[-1]))
+				return
+			# An older cached listing is only checked against the folder's mtime, which does not change when a file grows.
+		else:
+			metadata = self.metadataCache.get(path)
+			if metadata is not None:
+				self.metadataCache.move_to_end(path)
+				self._announceMetadata(path, metadata)
+				return
+		# A single stat, off the main thread since favorites may live on slow network shares.
+		future = self.listingExecutor.submit(listing.readMetadata, path)
+		future.add_done_callback(lambda future: wx.CallAfter(self._onMetadataRead, path, future))
+
+	def _onMetadataRead(self, path, future):
+		error = future.exception()
+		if error is not None:
+			ui.message(_("Error: {}").format(error))
+			return
+		self.metadataCache[path] = future.result()
+		while len(self.metadataCache) > METADATA_CACHE_ENTRIES:
+			self.metadataCache.popitem(last=False)
+		# Only speak if the user is still on that item.
+		if self._getCurrentItem()[1] == path:
+			self._announceMetadata(path, future.result())
+
+	@staticmethod
+	def _announceMetadata(path, metadata):
+		isDirectory, size, mtime = metadata
+		modified = time.strftime("%x %X", time.localtime(mtime))
+		if isDirectory:
+			ui.message(_("Carpeta, modificada {}").format(modified))
+			return
+		extension = os.path.splitext(path)[1][1:]
+		kind = _("Archivo {}").format(extension.upper()) if extension else _("Archivo")
+		ui.message(_("{}, {}, modificado {}").format(kind, fileOperations.formatSize(size), modified))
+
+	def _sizeJobPath(self):
+		"""
+		Devuelve la carpeta enfocada para un cálculo de tamaño, o None tras anunciar por qué no es posible. Si ya hay un cálculo en curso, lo cancela.
+		"""
+		if self.sizeJob is not None and not self.sizeJob.finished:
+			self.sizeJob.cancel()
+			ui.message(_("Cancelando el cálculo del tamaño..."))
+			return None
+		if self._is_actions_menu():
+			return None
+		item, path = self._getCurrentItem()
+		if not path:
+			return None
+		if not self._isDirectory(path):
+			ui.message(_("Solo se puede calcular el tamaño de una carpeta."))
+			return None
+		return path
+
+	@script(description=_("Calcula el tamaño total de la carpeta actual; pulsado dos veces, la vuelve a recorrer entera sin usar lo guardado. Durante el cálculo, lo cancela"), gesture="kb:alt+NVDA+s")
+	def script_folderSize(self, gesture):
+		# The second press of a double press replaces the calculation started by the first.
+		full = getLastScriptRepeatCount() == 1
+		if full and self.sizeJob is not None and not self.sizeJob.finished and not self.sizeJob.full:
+			self.sizeJob.cancel()
+			self.sizeJob = None
+		path = self._sizeJobPath()
+		if path is None:
+			return
+		self.sizeJob = self.folderSizes.calculate(
+			path,
+			onProgress=lambda job: wx.CallAfter(self._onFolderSizeProgress, job),
+			onFinished=lambda job: wx.CallAfter(self._onFolderSizeFinished, job),
+			progressInterval=config.conf["virtualExplorer"]["fileProgressInterval"],
+			full=full
+		)
+		name = os.path.basename(path.rstrip(os.sep)) or path
+		ui.message(_("Recontando el tamaño de {}...").format(name) if full else _("Calculando el tamaño de {}...").format(name))
+
+	@script(description=_("Muestra los archivos y carpetas más grandes dentro de la carpeta actual, o cancela la búsqueda en curso"), gesture="kb:alt+NVDA+shift+s")
+	def script_largestItems(self, gesture):
+		path = self._sizeJobPath()
+		if path is None:
+			return
+		self.sizeJob = self.folderSizes.findLargest(
+			path,
+			config.conf["virtualExplorer"]["largestItemsCount"],
+			onProgress=lambda job: wx.CallAfter(self._onFolderSizeProgress, job),
+			onFinished=lambda job: wx.CallAfter(self._onLargestItemsFinished, job),
+			progressInterval=config.conf["virtualExplorer"]["fileProgressInterval"]
+		)
+		ui.message(_("Buscando los elementos más grandes de {}...").format(os.path.basename(path.rstrip(os.sep)) or path))
+
+	def _onLargestItemsFinished(self, job):
+		if job.status != folderSize.SizeJob.DONE:
+			self._onFolderSizeFinished(job)
+			return
+		level = job.level()
+		if not level:
+			ui.message(_("La carpeta está vacía."))
+			return
+		if self._is_actions_menu():
+			self._popLevel()
+		ui.message(_("{} en {} archivos. Elementos más grandes:").format(fileOperations.formatSize(job.totalBytes), job.totalFiles))
+		self.navigation_token += 1
+		self._pushLevel(level)
+		self.script_nextPath(None)
+
+	def _onFolderSizeProgress(self, job):
+		if job.finished or job is not self.sizeJob:
+			return
+		ui.message(_("Por ahora {} en {} archivos").format(fileOperations.formatSize(job.totalBytes), job.totalFiles))
+
+	def _onFolderSizeFinished(self, job):
+		if job is not self.sizeJob:
+			# Replaced by a full recount.
+			return
+		log.debug(f"Virtual explorer folder size of {job.path}: {job.totalFolders} folders, {job.cachedFolders} from the cache")
+		if job.status == folderSize.SizeJob.CANCELLED:
+			ui.message(_("Cálculo cancelado, {} en {} archivos hasta ahora").format(fileOperations.formatSize(job.totalBytes), job.totalFiles))
+			return
+		if job.status == folderSize.SizeJob.FAILED:
+			log.error(f"Virtual explorer folder size failed: {job.error}")
+			ui.message(_("Error al calcular el tamaño: {}").format(job.error))
+			return
+		ui.message(_("{}: {} en {} archivos y {} carpetas").format(
+			os.path.basename(job.path.rstrip(os.sep)) or job.path,
+			# The folder itself is not one of its subfolders.
+			fileOperations.formatSize(job.totalBytes), job.totalFiles, max(job.totalFolders - 1, 0)
+		))
+
+	@script(description=_("Filtra el contenido de la carpeta actual"), gesture="kb:alt+NVDA+shift+l")
+	def script_filterLevel(self, gesture):
+		level = None if self.empty else self.navigation_stack[-1]
+		if not isinstance(level, listing.DirectoryLevel):
+			ui.message(_("Solo se puede filtrar el contenido de una carpeta."))
+			return
+		wx.CallAfter(self._showFilterDialog, level)
+
+	def _showFilterDialog(self, level):
+		gui.mainFrame.prePopup()
+		with filterDialog(gui.mainFrame, level.filter) as dialog:
+			result = dialog.ShowModal()
+			text, hideHidden, kind = dialog.getValues()
+		gui.mainFrame.postPopup()
+		if result != wx.ID_OK or self.empty or self.navigation_stack[-1] is not level:
+			return
+		# The folder is scanned again with the filter; the current view stays until the first matches arrive.
+		self.prefetcher.cancel()
+		self.navigation_token += 1
+		token = self.navigation_token
+		filtered = listing.DirectoryLevel(level.path, listing.EntryFilter(text, hideHidden, kind))
+		filtered.replaces = level
+		self.listingExecutor.submit(self._scanLevel, filtered, token)
+		core.callLater(200, self._announceLoading, token, filtered)
+
+	@script(description=_("Cambia el orden de los elementos de las carpetas"), gesture="kb:alt+NVDA+o")
+	def script_cycleSortMode(self, gesture):
+		modes = listing.SORT_MODES
+		mode = modes[(modes.index(config.conf["virtualExplorer"]["listingSortMode"]) + 1) % len(modes)]
+		config.conf["virtualExplorer"]["listingSortMode"] = mode
+		ui.message(self.SORT_MODE_NAMES[mode])
+		if self.empty:
+			return
+		level = self.navigation_stack[-1]
+		if isinstance(level, listing.DirectoryLevel) and level.complete and not level.hasFreshStats() and mode in ("modified", "size"):
+			# The cached sizes and dates may be stale, so the folder is listed again in the new order.
+			self.listingCache.invalidate(level.path)
+			self._refreshLevel(level.path, self._getCurrentItem()[1], announce=False)
+		elif isinstance(level, listing.DirectoryLevel) and level.complete:
+			# Orders already computed for this level are reused; new ones are sorted off the main thread.
+			future = self.listingExecutor.submit(level.entries.sortedOrder, mode)
+			future.add_done_callback(lambda future: wx.CallAfter(self._onLevelSorted, level, mode, future))
+
+	def _onLevelSorted(self, level, mode, future):
+		# Ignore results of a mode the user already moved past.
+		if future.exception() is None and mode == config.conf["virtualExplorer"]["listingSortMode"]:
+			self._applyOrder(level, future.result())
+
+	@staticmethod
+	def _isLoading(level):
+		return isinstance(level, listing.DirectoryLevel) and not level.complete
+
+	def _announceCurrentItem(self):
+		current_level_list = self.navigation_stack[-1]
 		item, path = self._getCurrentItem()
-		identifier = item[1] if isinstance(item, list) else os.path.basename(path)
-		ui.message(_("{} {} de {}").format(identifier, self.counters[-1] + 1, len(current_level_list)))
+		identifier = self._itemName(item)
+		if isinstance(current_level_list, folderSize.LargestItems):
+			identifier = _("{}, {}").format(identifier, fileOperations.formatSize(current_level_list.sizes[self.counters[-1]]))
+		if self._isLoading(current_level_list):
+			ui.message(_("{} {} de al menos {}").format(identifier, self.counters[-1] + 1, len(current_level_list)))
+		else:
+			ui.message(_("{} {} de {}").format(identifier, self.counters[-1] + 1, len(current_level_list)))
+		self._prefetchAround()
+
+	def _prefetchAround(self):
+		"""
+		Pide la precarga del elemento enfocado y de sus vecinos inmediatos; las precargas anteriores se descartan.
+		"""
+		if self._is_actions_menu():
+			self.prefetcher.cancel()
+			return
+		current_level_list = self.navigation_stack[-1]
+		index = self.counters[-1]
+		paths = []
+		for i in (index, index + 1, index - 1):
+			if 0 <= i < len(current_level_list):
+				item = current_level_list[i]
+				paths.append(item.path if isinstance(item, Favorite) else item)
+		self.prefetcher.prefetch(paths)
+
+	def getScript(self, gesture):
+		# While type-ahead is active, plain keys are captured to build the search prefix.
+		if self.typeahead_active and time.monotonic() - self.typeahead_time > TYPEAHEAD_TIMEOUT:
+			self._stopTypeAhead(announce=False)
+		if self.typeahead_active and isinstance(gesture, keyboardHandler.KeyboardInputGesture) and not gesture.modifiers:
+			return self.script_typeAheadKey
+		script = super(GlobalPlugin, self).getScript(gesture)
+		# The deferred initialization is never waited for here, on NVDA's main thread.
+		if script is not None and not self._ensureInitialized():
+			return self.script_notInitialized
+		return script
+
+	def script_notInitialized(self, gesture):
+		if not self._initEvent.is_set():
+			ui.message(_("El explorador virtual aún se está cargando."))
+			return
+		ui.message(_("El explorador virtual no pudo abrir su base de datos."))
+
+	@script(description=_("Activa o desactiva la búsqueda rápida por nombre en el nivel actual"), gesture="kb:alt+NVDA+t")
+	def script_toggleTypeAhead(self, gesture):
+		if self.typeahead_active:
+			self._stopTypeAhead()
+			return
+		if self.empty:
+			ui.message(_("¡No hay rutas guardadas!"))
+			return
+		self.typeahead_active = True
+		self.typeahead_prefix = ""
+		self.typeahead_time = time.monotonic()
+		ui.message(_("Búsqueda rápida activada. Escribe el inicio del nombre; escape para salir."))
+
+	def _stopTypeAhead(self, announce=True):
+		self.typeahead_active = False
+		self.typeahead_prefix = ""
+		if announce:
+			ui.message(_("Búsqueda rápida desactivada."))
+
+	def event_gainFocus(self, obj, nextHandler):
+		# Keys typed in another window or control must not be taken for a search.
+		if self.typeahead_active:
+			self._stopTypeAhead(announce=False)
+		nextHandler()
+
+	def script_typeAheadKey(self, gesture):
+		key = gesture.mainKeyName
+		if key in ("escape", "enter"):
+			self._stopTypeAhead()
+			return
+		if self.empty or not self.navigation_stack[-1]:
+			return
+		self.typeahead_time = time.monotonic()
+		if key == "backspace":
+			self.typeahead_prefix = self.typeahead_prefix[:-1]
+			if not self.typeahead_prefix:
+				return
+		elif key == "space":
+			self.typeahead_prefix += " "
+		elif len(key) == 1:
+			self.typeahead_prefix += key
+		else:
+			# Any other key leaves type-ahead mode and keeps its usual behaviour.
+			self._stopTypeAhead()
+			gesture.send()
+			return
+		prefix = self.typeahead_prefix
+		# Typing the same letter repeatedly cycles through the entries starting with it.
+		cycle = len(prefix) > 1 and prefix == prefix[0] * len(prefix)
+		position = self._getPrefixIndex().find(prefix[0] if cycle else prefix, self.counters[-1], cycle)
+		if position is None:
+			ui.message(_("Sin coincidencias para {}").format(prefix))
+			return
+		self.counters[-1] = position
+		self._announceCurrentItem()
 
 	@script(description=_("Va a la siguiente categoría"), gesture="kb:NVDA+alt+downArrow")
 	def script_nextCategory(self, gesture):
@@ -533,8 +1418,7 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		ui.message(_("{} ({} elementos)").format(current_category_name, num_items))
 		
 		# Reset navigation to the new category's path list
-		self.navigation_stack = [self.fav_paths[current_category_name]]
-		self.counters = [-1]
+		self._resetNavigation(self.fav_paths[current_category_name])
 
 	@script(description=_("Va a la categoría anterior"), gesture="kb:NVDA+alt+upArrow")
 	def script_previousCategory(self, gesture):
@@ -554,5 +1438,4 @@ class GlobalPlugin (globalPluginHandler.GlobalPlugin):
 		ui.message(_("{} ({} elementos)").format(current_category_name, num_items))
 
 		# Reset navigation to the new category's path list
-		self.navigation_stack = [self.fav_paths[current_category_name]]
-		self.counters = [-1]
+		self._resetNavigation(self.fav_paths[current_category_name])
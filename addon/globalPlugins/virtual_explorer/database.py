@@ -1,35 +1,257 @@
 import sys
 import os
+import queue
+import threading
+from concurrent.futures import Future
 dirAddon= os.path.dirname(__file__)
-sys.path.append(dirAddon)
-sys.path.append(os.path.join(dirAddon, "lib"))
-if sys.version.startswith("3.11"):
-    sys.path.append(os.path.join(dirAddon, "lib", "_311"))
-    from .lib._311 import sqlite3 
-    sqlite3.__path__.append(os.path.join(dirAddon, "lib", "_311", "sqlite3"))
-else:
-    sys.path.append(os.path.join(dirAddon, "lib", "_37"))
-    from .lib._37 import sqlite3
-    sqlite3.__path__.append(os.path.join(dirAddon, "lib", "_37", "sqlite3"))
-del sys.path[-3:]
+
+# Oldest SQLite able to run the schemas: FTS5 with the "remove_diacritics 2" tokenizer option needs 3.27.
+MIN_SQLITE_VERSION = (3, 27, 0)
+
+# The sqlite3 module is resolved on first use by loadSqlite3, not when NVDA imports the addon.
+_backend = None
+_backendLock = threading.Lock()
+
+def _isCompatible(module):
+    if module.sqlite_version_info < MIN_SQLITE_VERSION:
+        return False
+    try:
+        connection = module.connect(":memory:")
+        try:
+            connection.execute("create virtual table probe using fts5(name)")
+        finally:
+            connection.close()
+    except module.Error:
+        return False
+    return True
+
+def _importBundled():
+    sys.path.append(dirAddon)
+    sys.path.append(os.path.join(dirAddon, "lib"))
+    try:
+        if sys.version.startswith("3.11"):
+            sys.path.append(os.path.join(dirAddon, "lib", "_311"))
+            from .lib._311 import sqlite3
+            sqlite3.__path__.append(os.path.join(dirAddon, "lib", "_311", "sqlite3"))
+        else:
+            sys.path.append(os.path.join(dirAddon, "lib", "_37"))
+            from .lib._37 import sqlite3
+            sqlite3.__path__.append(os.path.join(dirAddon, "lib", "_37", "sqlite3"))
+    finally:
+        del sys.path[-3:]
+    return sqlite3
+
+def loadSqlite3():
+    """
+    Returns the sqlite3 module, preferring the interpreter's own when it is present and compatible
+    and falling back to the copy bundled for this Python version. The choice is made once and cached.
+    """
+    global _backend, sqlite3
+    if _backend is None:
+        with _backendLock:
+            if _backend is None:
+                try:
+                    import sqlite3 as module
+                    if not _isCompatible(module):
+                        module = None
+                except ImportError:
+                    module = None
+                if module is None:
+                    module = _importBundled()
+                # Later lookups of the module global, here and from other modules, skip this function.
+                sqlite3 = _backend = module
+    return _backend
+
+def __getattr__(name):
+    # database.sqlite3 is loaded on first access.
+    if name == "sqlite3":
+        return loadSqlite3()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Pragmas applied to every connection: WAL avoids rewriting a rollback journal on every commit
+# and lets readers work while a write is in flight; NORMAL is safe with WAL and skips most fsyncs.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-4096",
+    "PRAGMA temp_store=MEMORY",
+)
+
+def _createPaths(cursor):
+    cursor.execute("create table if not exists paths(path text not null, identifier text not null, fixed integer not null, category text)")
+    # Databases created before categories existed lack the column.
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(paths)").fetchall()]
+    if "category" not in columns:
+        cursor.execute("ALTER TABLE paths ADD COLUMN category TEXT")
+
+def _indexPaths(cursor):
+    # Identifiers used to be unique only by convention; the oldest row of a duplicate keeps its
+    # identifier and the later ones get a numbered suffix, so no favorite is lost.
+    used = {row[0] for row in cursor.execute("select identifier from paths")}
+    duplicates = cursor.execute(
+        "select rowid, identifier from paths where rowid not in (select min(rowid) from paths group by identifier) order by rowid"
+    ).fetchall()
+    for rowid, identifier in duplicates:
+        number = 2
+        while f"{identifier} ({number})" in used:
+            number += 1
+        renamed = f"{identifier} ({number})"
+        used.add(renamed)
+        cursor.execute("update paths set identifier=? where rowid=?", (renamed, rowid))
+        print(f"Renamed duplicate favorite {identifier!r} to {renamed!r}")
+    cursor.execute("create unique index if not exists paths_identifier on paths(identifier)")
+    cursor.execute("create index if not exists paths_category on paths(category)")
+
+# Schema migrations, applied in order; PRAGMA user_version stores how many have run.
+MIGRATIONS = (
+    _createPaths,
+    _indexPaths,
+)
+
+def connectCache(path, version, schema, dropSchema):
+    """
+    Opens a database that only caches data read from the file system, such as the file index or the
+    folder sizes. There are no migrations: a database older than version is rebuilt by running
+    dropSchema and then schema.
+    """
+    connection = loadSqlite3().connect(path)
+    # WAL lets readers see the last committed state while the cache is being written.
+    connection.execute("pragma journal_mode=wal")
+    connection.execute("pragma synchronous=normal")
+    if connection.execute("pragma user_version").fetchone()[0] < version:
+        with connection:
+            for statement in dropSchema:
+                connection.execute(statement)
+            for statement in schema:
+                connection.execute(statement)
+            connection.execute(f"pragma user_version={version}")
+    return connection
+
 class database:
-    def __init__(self, DBName):
-        self.db = sqlite3.connect(DBName)
-        self.cursor = self.db.cursor()
+    def __init__(self, DBName, threaded=False):
+        # In threaded mode a single worker thread owns the connection and runs every request
+        # from a queue, so SQLite I/O never happens on the caller's thread.
+        self.threaded = threaded
+        self.db = None
+        self.cursor = None
         self.modifiedRows = 0
         self.autoCommit = False
+        # Write-behind state, see enableWriteBehind.
+        self.writeBehind = False
+        self.pendingWrites = 0
+        self.maxPendingWrites = 100
+        self.flushDelay = 1000
+        self._callLater = None
+        self._flushTimer = None
+        self._worker = None
+        self._requests = None
+        if threaded:
+            self._startWorker()
+        self.open(DBName)
+    def _startWorker(self):
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="virtualExplorerDatabase", daemon=True)
+        self._worker.start()
+    def _run(self):
+        while True:
+            # While a write-behind batch is pending, an idle queue means it is time to flush.
+            timeout = self.flushDelay / 1000 if self.pendingWrites else None
+            try:
+                request = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                self._flush()
+                continue
+            if request is None:
+                return
+            function, args, future = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except BaseException as e:
+                future.set_exception(e)
+    def submit(self, function, *args, callback=None):
+        """
+        Runs function(*args) on the thread that owns the connection and returns a Future.
+        callback(future) is called once it finishes, from that thread.
+        Without threaded mode the function runs immediately.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        if self.threaded and threading.current_thread() is not self._worker:
+            self._requests.put((function, args, future))
+            return future
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(function(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        return future
+    def _call(self, function, *args):
+        return self.submit(function, *args).result()
+    def _configure(self):
+        for pragma in PRAGMAS:
+            try:
+                self.cursor.execute(pragma)
+            except sqlite3.OperationalError as e:
+                print(e)
+    def enableWriteBehind(self, callLater, flushDelay=1000, maxPendingWrites=100):
+        """
+        Groups the changes of several commit() calls into one transaction.
+        callLater(milliseconds, function) must run function later on the thread that owns the connection
+        and return an object with a Stop() method; it is used to flush once the writes go idle.
+        In threaded mode the worker flushes by itself and callLater is not used.
+        """
+        self.writeBehind = True
+        self._callLater = callLater
+        self.flushDelay = flushDelay
+        self.maxPendingWrites = maxPendingWrites
+    def flush(self):
+        """Commits the pending batch, if any."""
+        self._call(self._flush)
+    def _flush(self):
+        if self._flushTimer is not None:
+            self._flushTimer.Stop()
+            self._flushTimer = None
+        if self.pendingWrites and self.db is not None:
+            self.pendingWrites = 0
+            try:
+                self.db.commit()
+            except sqlite3.OperationalError as e:
+                print(e)
     def close(self):
+        self._call(self._close)
+        if self.threaded and self._worker is not None:
+            self._requests.put(None)
+            self._worker.join(5)
+            self._worker = None
+    def _close(self):
         if self.db is not None:
+            self._flush()
             self.cursor.close()
             self.db.close()
             self.cursor = None
             self.db = None
             self.modifiedRows = 0
     def open(self, DBName):
+        if self.threaded and self._worker is None:
+            self._startWorker()
+        self._call(self._open, DBName)
+    def _open(self, DBName):
         if self.db is None:
-            self.db = sqlite3.connect(DBName)
+            loadSqlite3()
+            # The plugin may open the connection on its initialization thread and use it later from
+            # the main thread; access is never concurrent, so the same-thread check is disabled.
+            self.db = sqlite3.connect(DBName, check_same_thread=False)
             self.cursor = self.db.cursor()
+            self._configure()
     def execute(self, query, values = (), rowsAmount=-1):
+        return self._call(self._execute, query, values, rowsAmount)
+    def executeAsync(self, query, values = (), rowsAmount=-1, callback=None):
+        """Like execute, but returns a Future instead of waiting for the results."""
+        return self.submit(self._execute, query, values, rowsAmount, callback=callback)
+    def _execute(self, query, values = (), rowsAmount=-1):
         try:
             self.cursor.execute(query, values)
             results = []
@@ -45,29 +267,79 @@ class database:
             return results
         except sqlite3.OperationalError as e:
             print(e)
-    def create(self, tableName, params):
+    def executemany(self, query, values):
+        return self._call(self._executemany, query, values)
+    def _executemany(self, query, values):
         try:
-            self.execute(f"create table if not exists {tableName}({params})")
+            self.cursor.executemany(query, values)
+            self.modifiedRows = self.cursor.rowcount
+            if self.autoCommit:
+                self.db.commit()
         except sqlite3.OperationalError as e:
             print(e)
+    def write(self, query, values = (), many=False, callback=None):
+        """
+        Executes a change and commits it (subject to write-behind) without waiting for it in threaded mode.
+        Requests run in order, so later reads always see the change.
+        """
+        future = self.submit(self._write, query, values, many, callback=callback)
+        future.add_done_callback(_reportFailure)
+        return future
+    def _write(self, query, values, many):
+        if many:
+            self._executemany(query, values)
+        else:
+            self._execute(query, values)
+        self._commit()
     def commit(self):
+        self._call(self._commit)
+    def _commit(self):
+        # With write-behind, a commit only marks the end of one change; the whole batch is
+        # committed at once, so a crash loses the batch but never leaves half of it applied.
+        if self.writeBehind:
+            self.pendingWrites += 1
+            if self.pendingWrites >= self.maxPendingWrites:
+                self._flush()
+            elif not self.threaded:
+                if self._flushTimer is not None:
+                    self._flushTimer.Stop()
+                self._flushTimer = self._callLater(self.flushDelay, self._flush)
+            return
         try:
             self.db.commit()
         except sqlite3.OperationalError as e:
             print(e)
     def rollback(self):
+        self._call(self._rollback)
+    def _rollback(self):
+        # Discards the whole pending batch.
+        self.pendingWrites = 0
         try:
             self.db.rollback()
         except sqlite3.OperationalError as e:
             print(e)
     def migrate_schema(self):
+        self._call(self._migrate_schema)
+    def _migrate_schema(self):
         try:
-            # Check if 'category' column exists in 'paths' table
-            results = self.execute("PRAGMA table_info(paths)")
-            columns = [row[1] for row in results]
-            if "category" not in columns:
-                self.execute("ALTER TABLE paths ADD COLUMN category TEXT")
-                self.commit()
+            version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
         except sqlite3.OperationalError as e:
-            # This may happen if the table does not exist yet, which is fine.
-            print(f"Could not migrate schema: {e}")
\ No newline at end of file
+            print(f"Could not migrate schema: {e}")
+            return
+        for number, migration in enumerate(MIGRATIONS, 1):
+            if number <= version:
+                continue
+            # Each migration and its version bump are applied atomically.
+            try:
+                self.cursor.execute("BEGIN")
+                migration(self.cursor)
+                self.cursor.execute(f"PRAGMA user_version={number}")
+                self.db.commit()
+            except sqlite3.Error as e:
+                self.db.rollback()
+                print(f"Could not migrate schema to version {number}: {e}")
+                return
+
+def _reportFailure(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Database write failed: {future.exception()}")
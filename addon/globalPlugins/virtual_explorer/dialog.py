@@ -4,6 +4,18 @@ import addonHandler
 addonHandler.initTranslation()
 import os
 
+class pathsList(wx.ListCtrl):
+	"""
+	Lista virtual de rutas: solo guarda cuántas filas hay y pide el texto de cada una al diálogo cuando se va a mostrar.
+	"""
+	def __init__(self, parent, dialog):
+		super(pathsList, self).__init__(parent, wx.ID_ANY, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_NO_HEADER | wx.LC_SINGLE_SEL)
+		self.dialog = dialog
+		self.InsertColumn(0, _("Ruta"), width=600)
+
+	def OnGetItemText(self, item, column):
+		return self.dialog.formatRow(item)
+
 class pathsDialog(wx.Dialog):
 	"""
 	Clase que lanzará el diálogo para añadir las carpetas, heredando de wx.dialog.
@@ -17,6 +29,8 @@ class pathsDialog(wx.Dialog):
 
 		self.data = data #Se crea una referencia local hacia el objeto de globalPlugin creado en el módulo __init__, este es pasado en uno de los parámetros en el constructor.
 		self.displayed_paths = []
+		# Category shown in the list, None for every category.
+		self.displayed_category = None
 
 		#Se asigna el marco correspondiente y se crea el panel donde serán añadidos los controles de GUI.
 		self.frame = frame
@@ -46,7 +60,7 @@ class pathsDialog(wx.Dialog):
 		self.browseBTN.Bind(wx.EVT_BUTTON, self.onBrowse)
 
 		label3 = wx.StaticText(self.Panel, wx.ID_ANY, label=_("&Rutas añadidas:"))
-		self.list = wx.ListCtrl(self.Panel, wx.ID_ANY, style=wx.LC_LIST | wx.LC_SINGLE_SEL)
+		self.list = pathsList(self.Panel, self)
 		self.list.Bind(wx.EVT_CONTEXT_MENU, self.onActions)
 		self.list.Bind(wx.EVT_KEY_DOWN, self.onDeleteItem)
 
@@ -54,6 +68,12 @@ class pathsDialog(wx.Dialog):
 
 		self.actionsBTN = wx.Button(self.Panel, label=_("Acciones"))
 		self.actionsBTN.Bind(wx.EVT_BUTTON, self.onActions)
+		#Translators: Button to import favorites from a JSON Lines or CSV file.
+		self.importBTN = wx.Button(self.Panel, label=_("&Importar..."))
+		self.importBTN.Bind(wx.EVT_BUTTON, self.onImport)
+		#Translators: Button to export every favorite to a JSON Lines or CSV file.
+		self.exportBTN = wx.Button(self.Panel, label=_("E&xportar..."))
+		self.exportBTN.Bind(wx.EVT_BUTTON, self.onExport)
 		#Translators: It is the accept button to confirm the data entered.
 		self.acceptBTN = wx.Button(self.Panel, label=_("&Aceptar"))
 		self.acceptBTN.Bind(wx.EVT_BUTTON, self.onAccept)
@@ -62,6 +82,7 @@ class pathsDialog(wx.Dialog):
 		self.cancelBTN.Bind(wx.EVT_BUTTON, self.onCancel)
 		#Se hace una vinculación hacia un método de evento para controlar teclas en la ventana.
 		self.Bind(wx.EVT_CHAR_HOOK, self.onkeyWindowDialog)
+		self.Bind(wx.EVT_CLOSE, self.onClose)
 
 		#Se crean las instancias de contenedores para añadir los controles.
 		sizeV = wx.BoxSizer(wx.VERTICAL)
@@ -78,6 +99,8 @@ class pathsDialog(wx.Dialog):
 		sizeV.Add(self.list, 1, wx.EXPAND) # Changed proportion to 1 to make it expand
 
 		sizeH.Add(self.actionsBTN, 1, wx.EXPAND)
+		sizeH.Add(self.importBTN, 1, wx.EXPAND)
+		sizeH.Add(self.exportBTN, 1, wx.EXPAND)
 		sizeH.Add(self.acceptBTN, 1, wx.EXPAND)
 		sizeH.Add(self.cancelBTN, 1, wx.EXPAND)
 
@@ -91,23 +114,77 @@ class pathsDialog(wx.Dialog):
 		self.addListItems()
 
 	def addListItems(self, category=None):
-		self.list.DeleteAllItems()
 		if category and category != _("Todas"):
-			self.displayed_paths = self.data.fav_paths.get(category, [])
+			# Each category list is already kept sorted by the plugin; copy it so it can be edited here.
+			self.displayed_category = category
+			self.displayed_paths = list(self.data.fav_paths.get(category, []))
 		else:
 			# Flatten the dictionary of paths into a single list and store it
+			self.displayed_category = None
 			self.displayed_paths = [item for cat_paths in self.data.fav_paths.values() for item in cat_paths]
-		
-		# Sort the displayed list
-		self.displayed_paths.sort(key=lambda x: (not x[2], x[1])) # Sort by fixed status (desc) and then by identifier (asc)
-
-		for idx, row in enumerate(self.displayed_paths):
-			# row is [path, identifier, fixed, category]
-			category_str = f" ({row[3]})" if row[3] and (not category or category == _("Todas")) else ""
-			if row[2] == 1:
-				self.list.InsertItem(idx, _("(Fijado) Nombre: {id}, Ruta: {path}{cat}").format(id=row[1], path=row[0], cat=category_str))
+			# Sort the displayed list
+			self.displayed_paths.sort(key=self.data._sortKey) # Sort by fixed status (desc) and then by identifier (asc)
+
+		# The rows are formatted on demand by OnGetItemText, only the count is set here.
+		self.list.SetItemCount(len(self.displayed_paths))
+		self.list.Refresh()
+
+	def formatRow(self, index):
+		try:
+			row = self.displayed_paths[index]
+		except IndexError:
+			return ""
+		category_str = f" ({row.category})" if row.category and self.displayed_category is None else ""
+		if row.fixed == 1:
+			return _("(Fijado) Nombre: {id}, Ruta: {path}{cat}").format(id=row.identifier, path=row.path, cat=category_str)
+		return _("Nombre: {id}, Ruta: {path}{cat}").format(id=row.identifier, path=row.path, cat=category_str)
+
+	def _sortedPosition(self, row):
+		key = self.data._sortKey(row)
+		low, high = 0, len(self.displayed_paths)
+		while low < high:
+			mid = (low + high) // 2
+			if self.data._sortKey(self.displayed_paths[mid]) < key:
+				low = mid + 1
 			else:
-				self.list.InsertItem(idx, _("Nombre: {id}, Ruta: {path}{cat}").format(id=row[1], path=row[0], cat=category_str))
+				high = mid
+		return low
+
+	def _focusRow(self, index):
+		if 0 <= index < len(self.displayed_paths):
+			self.list.Select(index)
+			self.list.Focus(index)
+
+	def insertRow(self, row):
+		"""
+		Añade una ruta nueva en su posición, si pertenece a la categoría mostrada, y repinta solo las filas desplazadas.
+		"""
+		if self.displayed_category is not None and row.category != self.displayed_category:
+			return
+		index = self._sortedPosition(row)
+		self.displayed_paths.insert(index, row)
+		self.list.SetItemCount(len(self.displayed_paths))
+		self.list.RefreshItems(index, len(self.displayed_paths) - 1)
+
+	def removeRow(self, index):
+		"""
+		Quita la fila indicada y repinta solo las filas que suben una posición.
+		"""
+		del self.displayed_paths[index]
+		self.list.SetItemCount(len(self.displayed_paths))
+		if index < len(self.displayed_paths):
+			self.list.RefreshItems(index, len(self.displayed_paths) - 1)
+		self._focusRow(min(index, len(self.displayed_paths) - 1))
+
+	def moveRow(self, index):
+		"""
+		Recoloca una ruta que cambió (fijada, desfijada o renombrada) y repinta solo las filas entre su posición anterior y la nueva.
+		"""
+		row = self.displayed_paths.pop(index)
+		newIndex = self._sortedPosition(row)
+		self.displayed_paths.insert(newIndex, row)
+		self.list.RefreshItems(min(index, newIndex), max(index, newIndex))
+		self._focusRow(newIndex)
 
 	def onCategoryChange(self, event):
 		selected_category = self.category.GetValue()
@@ -152,10 +229,10 @@ class pathsDialog(wx.Dialog):
 			
 			try:
 				path_data = self.displayed_paths[selected_index]
-				identifier = path_data[1]
+				identifier = path_data.identifier
 				if self.data.deletePath(identifier):
 					ui.message(_("Ruta eliminada correctamente."))
-					self.addListItems() # Refresh the list
+					self.removeRow(selected_index)
 			except IndexError:
 				ui.message(_("Error: la selección está fuera de rango."))
 		event.Skip()
@@ -173,8 +250,8 @@ class pathsDialog(wx.Dialog):
 
 		try:
 			path_data = self.displayed_paths[selected_index]
-			path = path_data[0]
-			identifier = path_data[1]
+			path = path_data.path
+			identifier = path_data.identifier
 		except IndexError:
 			ui.message(_("Error: la selección está fuera de rango."))
 			return
@@ -182,17 +259,17 @@ class pathsDialog(wx.Dialog):
 		if id == 1: # Fix
 			if self.data.fix(path, identifier):
 				ui.message(_("Ruta fijada correctamente."))
-				self.addListItems()
+				self.moveRow(selected_index)
 
 		elif id == 2: # Unfix
 			if self.data.unfix(path, identifier):
 				ui.message(_("Ruta desfijada correctamente."))
-				self.addListItems()
+				self.moveRow(selected_index)
 
 		elif id == 3: # Delete
 			if self.data.deletePath(identifier):
 				ui.message(_("Ruta eliminada correctamente."))
-				self.addListItems()
+				self.removeRow(selected_index)
 
 		elif id == 4: # Rename
 			with wx.TextEntryDialog(self, _("Introduce el nuevo nombre para la ruta:"), _("Renombrar ruta"), identifier) as dlg:
@@ -200,7 +277,41 @@ class pathsDialog(wx.Dialog):
 					new_identifier = dlg.GetValue()
 					if self.data.renamePath(identifier, new_identifier):
 						ui.message(_("Ruta renombrada correctamente."))
-						self.addListItems()
+						self.moveRow(selected_index)
+
+	FILE_WILDCARD = _("JSON Lines (*.jsonl)|*.jsonl|CSV (*.csv)|*.csv")
+
+	def onImport(self, event):
+		with wx.FileDialog(self, _("Importar rutas"), wildcard=self.FILE_WILDCARD, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as dialog:
+			if dialog.ShowModal() != wx.ID_OK:
+				return
+			filePath = dialog.GetPath()
+		try:
+			added, skipped = self.data.importPaths(filePath, self.onImported)
+		except (OSError, UnicodeDecodeError) as e:
+			ui.message(_("Error al importar: {}").format(e))
+			return
+		ui.message(_("{} rutas importadas, {} omitidas.").format(added, skipped))
+
+	def onImported(self):
+		# Called once the imported paths have been written and loaded again.
+		if not self:
+			return
+		self.category.SetItems([_("Todas")] + self.data.categories)
+		self.category.SetValue(_("Todas"))
+		self.addListItems()
+
+	def onExport(self, event):
+		with wx.FileDialog(self, _("Exportar rutas"), defaultFile="virtual_explorer.jsonl", wildcard=self.FILE_WILDCARD, style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as dialog:
+			if dialog.ShowModal() != wx.ID_OK:
+				return
+			filePath = dialog.GetPath()
+		try:
+			count = self.data.exportPaths(filePath)
+		except OSError as e:
+			ui.message(_("Error al exportar: {}").format(e))
+			return
+		ui.message(_("{} rutas exportadas.").format(count))
 
 	def onBrowse(self, event):
 		with wx.DirDialog(self, _("Selecciona una carpeta"), style=wx.DD_DEFAULT_STYLE) as dialog:
@@ -218,7 +329,7 @@ class pathsDialog(wx.Dialog):
 		categoryValue = self.category.GetValue()
 		pathValue = self.data.checkPath(pathValue)
 		if self.data.addPath(pathValue, identifierValue, categoryValue):
-			self.addListItems()
+			self.insertRow(self.data._findPath(identifierValue)[1])
 			self.path.SetValue("")
 			self.identifier.SetValue("")
 			self.category.SetValue("")
@@ -232,3 +343,43 @@ class pathsDialog(wx.Dialog):
 
 	def onCancel(self, event):
 		self.Close()
+
+	def onClose(self, event):
+		# Commit every change made in the dialog as a single batch.
+		self.data.db.submit(self.data.db.flush)
+		event.Skip()
+
+class filterDialog(wx.Dialog):
+	"""
+	Diálogo para elegir el filtro de la carpeta actual: patrones o extensiones, elementos ocultos y tipo de elementos.
+	"""
+	def __init__(self, parent, entryFilter=None):
+		#Translators: Title of the dialog used to filter the contents of the current folder.
+		super(filterDialog, self).__init__(parent, -1, title=_("Filtrar carpeta"))
+		self.Panel = wx.Panel(self)
+
+		#Translators: Label of the text field with glob patterns or extensions used to filter the folder.
+		label1 = wx.StaticText(self.Panel, wx.ID_ANY, label=_("&Patrones o extensiones, separados por espacios (por ejemplo *.log o .txt .md):"))
+		self.text = wx.TextCtrl(self.Panel, wx.ID_ANY, value=entryFilter.text if entryFilter else "")
+		self.hideHidden = wx.CheckBox(self.Panel, wx.ID_ANY, label=_("&Ocultar elementos ocultos y de sistema"))
+		self.hideHidden.SetValue(bool(entryFilter and entryFilter.hideHidden))
+		self.kinds = [_("Todos los elementos"), _("Solo archivos"), _("Solo carpetas")]
+		self.kind = wx.RadioBox(self.Panel, wx.ID_ANY, label=_("Mostrar"), choices=self.kinds)
+		self.kind.SetSelection(("all", "files", "folders").index(entryFilter.kind) if entryFilter else 0)
+
+		sizeV = wx.BoxSizer(wx.VERTICAL)
+		sizeV.Add(label1, 0, wx.EXPAND)
+		sizeV.Add(self.text, 0, wx.EXPAND)
+		sizeV.Add(self.hideHidden, 0, wx.EXPAND)
+		sizeV.Add(self.kind, 0, wx.EXPAND)
+		sizeV.Add(self.CreateButtonSizer(wx.OK | wx.CANCEL), 0, wx.EXPAND)
+		self.Panel.SetSizer(sizeV)
+		sizeV.Fit(self)
+		self.CenterOnScreen()
+		self.text.SetFocus()
+
+	def getValues(self):
+		"""
+		Devuelve (texto, ocultar elementos ocultos, tipo) tal como los espera listing.EntryFilter.
+		"""
+		return self.text.GetValue(), self.hideHidden.GetValue(), ("all", "files", "folders")[self.kind.GetSelection()]
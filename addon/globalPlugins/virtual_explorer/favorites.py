@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Registro compacto de una ruta favorita, usado en memoria en lugar de listas de cuatro elementos.
+"""
+
+
+class Favorite:
+	"""
+	Ruta favorita: ruta, identificador, si está fijada y categoría. Con __slots__ cada instancia ocupa menos que una lista y no tiene diccionario propio.
+	"""
+
+	__slots__ = ("path", "identifier", "fixed", "category")
+
+	def __init__(self, path, identifier, fixed=0, category=None):
+		self.path = path
+		self.identifier = identifier
+		self.fixed = fixed
+		self.category = category
+
+	@classmethod
+	def fromRow(cls, row):
+		"""
+		Crea el registro a partir de una fila (path, identifier, fixed, category) de la tabla paths.
+		"""
+		return cls(*row)
+
+	def __repr__(self):
+		return f"Favorite(path={self.path!r}, identifier={self.identifier!r}, fixed={self.fixed!r}, category={self.category!r})"
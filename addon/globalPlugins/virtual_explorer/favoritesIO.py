@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Lectura y escritura en flujo de rutas favoritas en formato JSON Lines y CSV, para importarlas o exportarlas en bloque.
+"""
+
+import csv
+import json
+import os
+
+FIELDS = ("path", "identifier", "fixed", "category")
+
+
+def _isCsv(filePath):
+	return os.path.splitext(filePath)[1].lower() == ".csv"
+
+
+def readFavorites(filePath):
+	"""
+	Generador que devuelve cada ruta del archivo como una tupla (path, identifier, fixed, category), sin cargar el archivo completo en memoria. Las líneas o filas mal formadas se omiten.
+	"""
+	with open(filePath, "r", encoding="utf-8-sig", newline="") as f:
+		records = csv.DictReader(f) if _isCsv(filePath) else _iterJsonLines(f)
+		for record in records:
+			try:
+				path = (record.get("path") or "").strip()
+				identifier = (record.get("identifier") or "").strip()
+				fixed = 1 if str(record.get("fixed") or 0).strip() in ("1", "true", "True") else 0
+				category = (record.get("category") or "").strip() or None
+			except AttributeError:
+				continue
+			yield path, identifier, fixed, category
+
+
+def _iterJsonLines(f):
+	for line in f:
+		line = line.strip()
+		if not line:
+			continue
+		try:
+			yield json.loads(line)
+		except ValueError:
+			continue
+
+
+def writeFavorites(filePath, rows):
+	"""
+	Escribe las rutas (iterable de tuplas path, identifier, fixed, category) en el archivo, eligiendo el formato por su extensión. Devuelve el número de rutas escritas.
+	"""
+	count = 0
+	with open(filePath, "w", encoding="utf-8", newline="") as f:
+		if _isCsv(filePath):
+			writer = csv.writer(f)
+			writer.writerow(FIELDS)
+			for row in rows:
+				writer.writerow(row)
+				count += 1
+		else:
+			for row in rows:
+				f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+				f.write("\n")
+				count += 1
+	return count
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Índice opcional de nombres de archivo de todas las rutas favoritas, guardado en una tabla FTS5 de SQLite y actualizado de forma incremental en un hilo en segundo plano.
+"""
+
+import os
+import threading
+from . import database
+
+SCHEMA_VERSION = 2
+_SCHEMA = (
+	# Regular table with the data, so a folder's previous contents can be looked up by parent.
+	"create table entries(id integer primary key, name text not null, parent text not null, size integer, mtime real, favorite text not null)",
+	"create index entries_parent on entries(parent)",
+	"create index entries_favorite on entries(favorite)",
+	# External-content FTS5 table over entries.name, kept in sync by the triggers below.
+	"create virtual table files using fts5(name, content='entries', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+	"create trigger entries_insert after insert on entries begin insert into files(rowid, name) values(new.id, new.name); end",
+	"create trigger entries_delete after delete on entries begin insert into files(files, rowid, name) values('delete', old.id, old.name); end",
+	# Last seen modification time of every indexed folder; unchanged folders are not listed again.
+	"create table directories(path text primary key, parent text not null, mtime real not null, favorite text not null)",
+	"create index directories_favorite on directories(favorite)",
+)
+_DROP_SCHEMA = (
+	"drop table if exists files",
+	"drop table if exists entries",
+	"drop table if exists directories",
+)
+# Maximum number of results returned by a search.
+SEARCH_LIMIT = 1000
+# Matches ranked by relevance per search; ranking every match of a short prefix would read the whole index.
+SEARCH_CANDIDATES = 5000
+
+
+class RefreshStats:
+	"""
+	Contadores de una pasada de indexación, para comprobar que su costo depende de lo que cambió.
+	"""
+
+	def __init__(self):
+		self.checkedDirectories = 0
+		self.listedDirectories = 0
+		self.added = 0
+		self.updated = 0
+		self.removed = 0
+
+	def __repr__(self):
+		return (
+			f"RefreshStats(checked={self.checkedDirectories}, listed={self.listedDirectories}, "
+			f"added={self.added}, updated={self.updated}, removed={self.removed})"
+		)
+
+
+class _Cancelled(Exception):
+	"""
+	Interrumpe la transacción de una ruta favorita cuando se cancela la indexación.
+	"""
+
+
+def buildQuery(text):
+	"""
+	Convierte el texto escrito por el usuario en una consulta FTS5 donde cada palabra se busca como prefijo.
+	"""
+	words = [word.replace('"', '""') for word in text.split()]
+	return " ".join(f'"{word}"*' for word in words)
+
+
+def _topLevelRoots(roots):
+	"""
+	Quita las rutas repetidas y las que están dentro de otra ruta de la lista, para no indexar dos veces el mismo árbol.
+	"""
+	result = []
+	for key, root in sorted({os.path.normcase(os.path.abspath(root)): root for root in roots}.items()):
+		if result and (key == result[-1][0] or key.startswith(result[-1][0].rstrip(os.sep) + os.sep)):
+			continue
+		result.append((key, root))
+	return [root for key, root in result]
+
+
+class FileIndex:
+	"""
+	Índice de archivos de las rutas favoritas. La construcción usa su propia conexión en un hilo aparte y cada búsqueda abre otra en el hilo que la pide, de modo que nunca se bloquean entre sí.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self.error = None
+		self.stats = RefreshStats()
+		# Number of entries after the last indexing pass, counted by its thread.
+		self.indexedEntries = 0
+		self._thread = None
+		self._cancelEvent = threading.Event()
+
+	def _connect(self):
+		return database.connectCache(self.path, SCHEMA_VERSION, _SCHEMA, _DROP_SCHEMA)
+
+	@property
+	def running(self):
+		return self._thread is not None and self._thread.is_alive()
+
+	def refresh(self, roots, onFinished=None, full=False):
+		"""
+		Actualiza en segundo plano el índice de las rutas indicadas, revisando solo las carpetas cuya fecha de modificación cambió. Con full se descarta lo indexado y se recorre todo de nuevo. Devuelve False si ya hay una indexación en curso.
+		"""
+		if self.running:
+			return False
+		self._cancelEvent.clear()
+		self._thread = threading.Thread(
+			target=self._run, args=(list(roots), onFinished, full),
+			name="virtualExplorerFileIndex", daemon=True
+		)
+		self._thread.start()
+		return True
+
+	def cancel(self):
+		self._cancelEvent.set()
+
+	def close(self):
+		self.cancel()
+
+	def _run(self, roots, onFinished, full):
+		self.error = None
+		self.stats = RefreshStats()
+		try:
+			connection = self._connect()
+			try:
+				roots = _topLevelRoots(root for root in roots if os.path.isdir(root))
+				# Forget favorites that are no longer indexed.
+				placeholders = ",".join("?" * len(roots))
+				with connection:
+					condition = "1" if full else f"favorite not in ({placeholders})"
+					connection.execute(f"delete from entries where {condition}", () if full else roots)
+					connection.execute(f"delete from directories where {condition}", () if full else roots)
+				for root in roots:
+					try:
+						self._refreshRoot(connection, root)
+					except _Cancelled:
+						break
+				self.indexedEntries = connection.execute("select count(*) from entries").fetchone()[0]
+			finally:
+				connection.close()
+		except database.sqlite3.Error as e:
+			self.error = e
+		if onFinished:
+			onFinished(self)
+
+	def _refreshRoot(self, connection, root):
+		"""
+		Recorre el árbol de una ruta favorita comparando la fecha de modificación de cada carpeta con la guardada. Las carpetas sin cambios no se vuelven a listar: sus subcarpetas se toman del índice.
+		"""
+		known = {}
+		children = {}
+		for path, parent, mtime in connection.execute("select path, parent, mtime from directories where favorite=?", (root,)):
+			known[path] = mtime
+			children.setdefault(parent, []).append(path)
+		# One transaction per favorite: searches keep seeing the previous contents until it is complete.
+		with connection:
+			stack = [root]
+			while stack:
+				if self._cancelEvent.is_set():
+					raise _Cancelled()
+				directory = stack.pop()
+				try:
+					mtime = os.stat(directory).st_mtime
+				except OSError:
+					continue
+				self.stats.checkedDirectories += 1
+				if known.get(directory) == mtime:
+					stack.extend(children.get(directory, ()))
+					continue
+				try:
+					subdirectories = self._diffDirectory(connection, root, directory)
+				except OSError:
+					# Folders we cannot read are simply left out of the index.
+					continue
+				self.stats.listedDirectories += 1
+				connection.execute(
+					"insert or replace into directories(path, parent, mtime, favorite) values(?, ?, ?, ?)",
+					(directory, os.path.dirname(directory), mtime, root)
+				)
+				stack.extend(subdirectories)
+
+	def _diffDirectory(self, connection, root, directory):
+		"""
+		Lista una carpeta que cambió y aplica al índice solo las diferencias con lo guardado. Devuelve sus subcarpetas.
+		"""
+		stored = {
+			name: (rowid, size, mtime)
+			for rowid, name, size, mtime in connection.execute("select id, name, size, mtime from entries where parent=?", (directory,))
+		}
+		added = []
+		updated = []
+		subdirectories = []
+		with os.scandir(directory) as entries:
+			for entry in entries:
+				try:
+					isDirectory = entry.is_dir(follow_symlinks=False)
+					stat = entry.stat(follow_symlinks=False)
+				except OSError:
+					continue
+				if isDirectory:
+					# Symbolic links to folders are not followed.
+					subdirectories.append(entry.path)
+				size = None if isDirectory else stat.st_size
+				previous = stored.pop(entry.name, None)
+				if previous is None:
+					added.append((entry.name, directory, size, stat.st_mtime, root))
+				elif previous[1:] != (size, stat.st_mtime):
+					updated.append((size, stat.st_mtime, previous[0]))
+		if added:
+			connection.executemany("insert into entries(name, parent, size, mtime, favorite) values(?, ?, ?, ?, ?)", added)
+		if updated:
+			connection.executemany("update entries set size=?, mtime=? where id=?", updated)
+		for name, (rowid, size, mtime) in stored.items():
+			# Whatever is left no longer exists; removed folders take their whole subtree with them.
+			connection.execute("delete from entries where id=?", (rowid,))
+			if size is None:
+				self._deleteSubtree(connection, os.path.join(directory, name))
+		self.stats.added += len(added)
+		self.stats.updated += len(updated)
+		self.stats.removed += len(stored)
+		return subdirectories
+
+	@staticmethod
+	def _deleteSubtree(connection, path):
+		# Every path under the folder sorts between "path" + sep and "path" + the next character after sep, so the indexes can be used.
+		low = path + os.sep
+		high = path + chr(ord(os.sep) + 1)
+		connection.execute("delete from entries where parent=? or (parent>=? and parent<?)", (path, low, high))
+		connection.execute("delete from directories where path=? or (path>=? and path<?)", (path, low, high))
+
+	def search(self, text, limit=SEARCH_LIMIT):
+		"""
+		Devuelve las rutas completas cuyos nombres contienen palabras que empiezan con las del texto. Solo se ordenan por relevancia las primeras SEARCH_CANDIDATES coincidencias. Puede tardar, así que no debe llamarse desde el hilo principal.
+		"""
+		query = buildQuery(text)
+		if not query:
+			return []
+		connection = self._connect()
+		try:
+			rows = connection.execute(
+				"select entries.parent, entries.name from "
+				"(select rowid, rank from files where files match ? limit ?) as candidates "
+				"join entries on entries.id = candidates.rowid order by candidates.rank limit ?",
+				(query, max(limit, SEARCH_CANDIDATES), limit)
+			).fetchall()
+		finally:
+			connection.close()
+		return [os.path.join(parent, name) for parent, name in rows]
+
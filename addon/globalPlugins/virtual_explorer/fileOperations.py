@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Motor de operaciones de archivo (copiar y mover) que se ejecutan en hilos de trabajo, con progreso y cancelación, para no bloquear NVDA.
+"""
+
+import errno
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+COPY = "copy"
+CUT = "cut"
+
+# Size of the buffer used when the contents have to go through Python.
+BUFFER_SIZE = 4 * 1024 * 1024
+# Bytes handed to the kernel per call when a kernel-side copy is available; cancellation is checked between calls.
+KERNEL_CHUNK_SIZE = 64 * 1024 * 1024
+# Errors meaning the kernel-side copy is not supported for this pair of files, so the next strategy is tried.
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF, errno.EOPNOTSUPP, errno.ENOTSUP}
+# Small files are handed to the copy threads in batches to keep the per-task overhead low.
+BATCH_FILES = 32
+BATCH_BYTES = 8 * 1024 * 1024
+
+
+class JobCancelled(Exception):
+	"""
+	Se lanza dentro del hilo de trabajo cuando el usuario cancela la operación.
+	"""
+
+
+class DestinationInsideSource(Exception):
+	"""
+	Se lanza cuando se intenta pegar una carpeta dentro de sí misma o de una de sus subcarpetas.
+	"""
+
+
+def isInside(path, folder):
+	"""
+	Indica si path es folder o está dentro de ella.
+	"""
+	path, folder = os.path.normcase(os.path.abspath(path)), os.path.normcase(os.path.abspath(folder))
+	try:
+		return os.path.commonpath([path, folder]) == folder
+	except ValueError:
+		# Paths on different drives.
+		return False
+
+
+class FileJob:
+	"""
+	Operación de archivo pendiente o en curso, junto con su progreso.
+	"""
+
+	PENDING = "pending"
+	RUNNING = "running"
+	DONE = "done"
+	CANCELLED = "cancelled"
+	FAILED = "failed"
+
+	def __init__(self, operation, source, destination):
+		self.operation = operation
+		self.source = source
+		self.destination = destination
+		self.status = self.PENDING
+		self.error = None
+		self.totalFiles = 0
+		self.totalBytes = 0
+		self.copiedFiles = 0
+		self.copiedBytes = 0
+		# True once the destination has been created by this job, so a cancel only removes what it wrote.
+		self.createdDestination = False
+		self.lastReport = 0.0
+		self._cancelEvent = threading.Event()
+		# Files of one job are copied from several threads at once.
+		self._progressLock = threading.Lock()
+
+	@property
+	def cancelled(self):
+		return self._cancelEvent.is_set()
+
+	def cancel(self):
+		self._cancelEvent.set()
+
+	def checkCancelled(self):
+		if self._cancelEvent.is_set():
+			raise JobCancelled()
+
+	def addProgress(self, copiedBytes=0, copiedFiles=0):
+		with self._progressLock:
+			self.copiedBytes += copiedBytes
+			self.copiedFiles += copiedFiles
+
+	@property
+	def finished(self):
+		return self.status in (self.DONE, self.CANCELLED, self.FAILED)
+
+
+class FileOperationQueue:
+	"""
+	Cola de operaciones de archivo atendida por hilos de trabajo. Las funciones onProgress y onFinished se llaman desde esos hilos.
+	"""
+
+	def __init__(self, onProgress=None, onFinished=None, workers=1, progressInterval=5.0, copyThreads=4):
+		self.onProgress = onProgress
+		self.onFinished = onFinished
+		self.progressInterval = progressInterval
+		# Number of files copied at the same time within one job.
+		self.copyThreads = max(1, copyThreads)
+		self._reportLock = threading.Lock()
+		self._queue = queue.Queue()
+		self._jobs = []
+		self._lock = threading.Lock()
+		self._threads = []
+		for i in range(max(1, workers)):
+			thread = threading.Thread(target=self._run, name=f"virtualExplorerFileOperations{i}", daemon=True)
+			thread.start()
+			self._threads.append(thread)
+
+	def submit(self, job):
+		with self._lock:
+			self._jobs.append(job)
+		self._queue.put(job)
+		return job
+
+	@property
+	def jobs(self):
+		"""
+		Operaciones que aún no han terminado, en el orden en que se enviaron.
+		"""
+		with self._lock:
+			return [job for job in self._jobs if not job.finished]
+
+	def cancelAll(self):
+		jobs = self.jobs
+		for job in jobs:
+			job.cancel()
+		return len(jobs)
+
+	def shutdown(self):
+		self.cancelAll()
+		for thread in self._threads:
+			self._queue.put(None)
+
+	def _run(self):
+		while True:
+			job = self._queue.get()
+			if job is None:
+				return
+			try:
+				self._process(job)
+			finally:
+				with self._lock:
+					self._jobs.remove(job)
+				if self.onFinished:
+					self.onFinished(job)
+
+	def _process(self, job):
+		# Once the copy is complete a failure can only come from deleting the source, and the copy must be kept.
+		copied = False
+		try:
+			job.checkCancelled()
+			job.status = FileJob.RUNNING
+			if os.path.isdir(job.source) and isInside(job.destination, job.source):
+				raise DestinationInsideSource(job.destination)
+			if job.operation == CUT and self._tryRename(job):
+				job.status = FileJob.DONE
+				return
+			self._measure(job)
+			self._copyTree(job)
+			copied = True
+			if job.operation == CUT:
+				job.checkCancelled()
+				if os.path.isdir(job.source):
+					shutil.rmtree(job.source)
+				else:
+					os.remove(job.source)
+			job.status = FileJob.DONE
+		except JobCancelled:
+			job.status = FileJob.CANCELLED
+			self._removePartial(job)
+		except Exception as e:
+			job.status = FileJob.FAILED
+			job.error = e
+			if not copied:
+				self._removePartial(job)
+
+	@staticmethod
+	def _tryRename(job):
+		"""
+		Intenta mover con un simple renombrado, lo que solo funciona dentro de la misma unidad.
+		"""
+		if os.path.exists(job.destination):
+			raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), job.destination)
+		try:
+			os.rename(job.source, job.destination)
+			return True
+		except OSError:
+			return False
+
+	@staticmethod
+	def _measure(job):
+		if os.path.isdir(job.source):
+			for root, dirs, files in os.walk(job.source):
+				job.checkCancelled()
+				for name in files:
+					try:
+						job.totalBytes += os.path.getsize(os.path.join(root, name))
+					except OSError:
+						pass
+				job.totalFiles += len(files)
+		else:
+			job.totalFiles = 1
+			job.totalBytes = os.path.getsize(job.source)
+
+	def _copyTree(self, job):
+		if os.path.exists(job.destination):
+			raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), job.destination)
+		job.createdDestination = True
+		job.lastReport = time.monotonic()
+		if not os.path.isdir(job.source):
+			self._copyFile(job, job.source, job.destination)
+			return
+		directories = []
+		with ThreadPoolExecutor(max_workers=self.copyThreads, thread_name_prefix="virtualExplorerCopy") as executor:
+			pending = set()
+
+			def submit(batch):
+				nonlocal pending
+				# Keep a bounded window of queued batches so huge trees do not pile up futures.
+				if len(pending) >= self.copyThreads * 2:
+					done, pending = wait(pending, return_when=FIRST_COMPLETED)
+					for future in done:
+						future.result()
+				pending.add(executor.submit(self._copyBatch, job, batch))
+
+			try:
+				batch, batchBytes = [], 0
+				stack = [(job.source, job.destination)]
+				while stack:
+					root, target = stack.pop()
+					job.checkCancelled()
+					# The folder is read before its copy is created, so a copy inside the source is never picked up.
+					with os.scandir(root) as iterator:
+						entries = list(iterator)
+					os.makedirs(target, exist_ok=True)
+					directories.append((root, target))
+					for entry in entries:
+						if entry.is_dir():
+							stack.append((entry.path, os.path.join(target, entry.name)))
+							continue
+						try:
+							size = entry.stat().st_size
+						except OSError:
+							size = 0
+						batch.append((entry.path, os.path.join(target, entry.name)))
+						batchBytes += size
+						if len(batch) >= BATCH_FILES or batchBytes >= BATCH_BYTES:
+							submit(batch)
+							batch, batchBytes = [], 0
+				if batch:
+					submit(batch)
+				for future in pending:
+					future.result()
+			except BaseException:
+				# Stop the files still running and drop the ones not started yet.
+				job.cancel()
+				for future in pending:
+					future.cancel()
+				raise
+		# Directory times change while files are written into them, so they are copied last, deepest first.
+		for root, target in reversed(directories):
+			shutil.copystat(root, target)
+
+	def _copyBatch(self, job, batch):
+		for source, destination in batch:
+			self._copyFile(job, source, destination)
+
+	def _copyFile(self, job, source, destination):
+		job.checkCancelled()
+		with open(source, "rb") as src, open(destination, "wb") as dst:
+			if not self._kernelCopy(job, src, dst):
+				self._bufferedCopy(job, src, dst)
+		shutil.copystat(source, destination)
+		job.addProgress(copiedFiles=1)
+		self._reportProgress(job)
+
+	def _kernelCopy(self, job, src, dst):
+		"""
+		Copia el contenido sin pasar por búferes de Python (copy_file_range o sendfile) cuando el sistema lo permite. Devuelve False si hay que usar la copia normal.
+		"""
+		size = os.fstat(src.fileno()).st_size
+		if size == 0:
+			return True
+		for name in ("copy_file_range", "sendfile"):
+			function = getattr(os, name, None)
+			if function is None:
+				continue
+			offset = 0
+			try:
+				while offset < size:
+					job.checkCancelled()
+					if name == "copy_file_range":
+						copied = function(src.fileno(), dst.fileno(), KERNEL_CHUNK_SIZE, offset, offset)
+					else:
+						copied = function(dst.fileno(), src.fileno(), offset, KERNEL_CHUNK_SIZE)
+					if copied == 0:
+						break
+					offset += copied
+					job.addProgress(copiedBytes=copied)
+					self._reportProgress(job)
+				return True
+			except OSError as e:
+				if offset or e.errno not in _FALLBACK_ERRNOS:
+					raise
+		return False
+
+	def _bufferedCopy(self, job, src, dst):
+		# A single reusable buffer avoids allocating a new bytes object per read.
+		buffer = memoryview(bytearray(BUFFER_SIZE))
+		while True:
+			job.checkCancelled()
+			read = src.readinto(buffer)
+			if not read:
+				break
+			dst.write(buffer[:read])
+			job.addProgress(copiedBytes=read)
+			self._reportProgress(job)
+
+	def _reportProgress(self, job):
+		now = time.monotonic()
+		if not self.onProgress or now - job.lastReport < self.progressInterval:
+			return
+		with self._reportLock:
+			if now - job.lastReport < self.progressInterval:
+				return
+			job.lastReport = now
+		self.onProgress(job)
+
+	@staticmethod
+	def _removePartial(job):
+		"""
+		Borra lo que se alcanzó a copiar de una operación cancelada o fallida; el origen nunca se toca.
+		"""
+		if not job.createdDestination:
+			return
+		try:
+			if os.path.isdir(job.destination):
+				shutil.rmtree(job.destination)
+			elif os.path.exists(job.destination):
+				os.remove(job.destination)
+		except OSError:
+			pass
+
+
+def formatSize(size):
+	"""
+	Convierte un número de bytes en una cadena legible.
+	"""
+	for unit in ("B", "KB", "MB", "GB"):
+		if size < 1024:
+			return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+		size /= 1024
+	return f"{size:.1f} TB"
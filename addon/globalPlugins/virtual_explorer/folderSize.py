@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Cálculo del tamaño total de una carpeta recorriendo su árbol con varios hilos. Lo que suma cada carpeta se guarda en SQLite junto con su fecha de modificación, para reutilizarlo en consultas posteriores sobre ella o sobre sus carpetas superiores. El mismo recorrido busca los archivos y carpetas más grandes de un árbol.
+"""
+
+import heapq
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from . import database
+from . import listing
+
+SCHEMA_VERSION = 1
+_SCHEMA = (
+	# Bytes and number of the files directly inside each folder, valid while its modification time does not change.
+	"create table directories(path text primary key, parent text not null, mtime real not null, bytes integer not null, files integer not null)",
+	"create index directories_parent on directories(parent)",
+)
+_DROP_SCHEMA = (
+	"drop table if exists directories",
+)
+
+
+def _keepLargest(heap, item, count):
+	"""
+	Añade item a un montículo de mínimos que conserva solo los count elementos más grandes.
+	"""
+	if len(heap) < count:
+		heapq.heappush(heap, item)
+	elif item > heap[0]:
+		heapq.heapreplace(heap, item)
+
+
+class SizeJob:
+	"""
+	Cálculo en curso o terminado del tamaño de una carpeta, con los totales parciales.
+	"""
+
+	RUNNING = "running"
+	DONE = "done"
+	CANCELLED = "cancelled"
+	FAILED = "failed"
+
+	def __init__(self, path, full=False):
+		self.path = path
+		# List every folder again instead of reusing what is stored for the unchanged ones.
+		self.full = full
+		self.status = self.RUNNING
+		self.error = None
+		self.totalBytes = 0
+		self.totalFiles = 0
+		self.totalFolders = 0
+		# Folders found unchanged since the previous calculation.
+		self.cachedFolders = 0
+		self._cancelEvent = threading.Event()
+
+	@property
+	def cancelled(self):
+		return self._cancelEvent.is_set()
+
+	def cancel(self):
+		self._cancelEvent.set()
+
+	@property
+	def finished(self):
+		return self.status != self.RUNNING
+
+	def addDirectory(self, path, size, files, subdirectories, largestFiles=()):
+		"""
+		Suma una carpeta ya leída. Se llama desde el hilo que coordina el cálculo.
+		"""
+		self.totalBytes += size
+		self.totalFiles += files
+		self.totalFolders += 1
+
+	def skipDirectory(self, path):
+		"""
+		Descarta una carpeta que no se pudo leer.
+		"""
+
+
+class LargestJob(SizeJob):
+	"""
+	Recorrido que, además de los totales, busca los count archivos y las count carpetas más grandes. Se guardan en montículos acotados, así la memoria no crece con el número de archivos.
+	"""
+
+	def __init__(self, path, count):
+		# The sizes of the files are needed, so every folder is listed.
+		super().__init__(path, full=True)
+		self.count = count
+		self._files = []
+		self._folders = []
+		# Folders still waiting for some subfolder: path -> [bytes so far, subfolders pending].
+		self._open = {}
+
+	def addDirectory(self, path, size, files, subdirectories, largestFiles=()):
+		super().addDirectory(path, size, files, subdirectories)
+		for item in largestFiles:
+			_keepLargest(self._files, item, self.count)
+		self._open[path] = [size, len(subdirectories)]
+		if not subdirectories:
+			self._closeDirectory(path)
+
+	def skipDirectory(self, path):
+		self._open[path] = [0, 0]
+		self._closeDirectory(path)
+
+	def _closeDirectory(self, path):
+		# A folder's total is known once all its subfolders are; it is then added to its parent, which may complete in turn.
+		while True:
+			size = self._open.pop(path)[0]
+			if path == self.path:
+				return
+			_keepLargest(self._folders, (size, path), self.count)
+			parent = self._open.get(os.path.dirname(path))
+			if parent is None:
+				return
+			parent[0] += size
+			parent[1] -= 1
+			if parent[1]:
+				return
+			path = os.path.dirname(path)
+
+	def level(self):
+		"""
+		Devuelve el nivel de navegación con lo encontrado, de mayor a menor.
+		"""
+		items = [(size, path, listing.FILE) for size, path in self._files]
+		items.extend((size, path, listing.DIRECTORY) for size, path in self._folders)
+		items.sort(reverse=True)
+		return LargestItems(self.path, items)
+
+
+class LargestItems:
+	"""
+	Nivel de navegación con los archivos y carpetas más grandes bajo una carpeta, con su tamaño y su tipo.
+	"""
+
+	def __init__(self, path, items):
+		self.path = path
+		self.paths = [item[1] for item in items]
+		self.sizes = array("q", (item[0] for item in items))
+		self.flags = bytearray(item[2] for item in items)
+
+	def isDirectory(self, index):
+		return self.flags[index] == listing.DIRECTORY
+
+	def __len__(self):
+		return len(self.paths)
+
+	def __getitem__(self, index):
+		return self.paths[index]
+
+	def __iter__(self):
+		return iter(self.paths)
+
+
+class FolderSizeCache:
+	"""
+	Calcula tamaños de carpetas en segundo plano. Los hilos del grupo solo leen el disco; la base de datos se usa únicamente desde el hilo que coordina cada cálculo.
+	"""
+
+	def __init__(self, path, threads=8):
+		self.path = path
+		self.threads = max(1, threads)
+		self._lock = threading.Lock()
+
+	def calculate(self, path, onProgress=None, onFinished=None, progressInterval=5.0, full=False):
+		"""
+		Empieza a calcular en segundo plano el tamaño de la carpeta y devuelve el SizeJob. onProgress(job) se llama cada progressInterval segundos y onFinished(job) al terminar, ambos desde el hilo del cálculo. Las carpetas cuya fecha de modificación no cambió se toman de la caché, aunque alguno de sus archivos haya crecido; con full se listan todas de nuevo y la caché se corrige.
+		"""
+		return self._start(SizeJob(os.path.normpath(path), full), onProgress, onFinished, progressInterval)
+
+	def findLargest(self, path, count, onProgress=None, onFinished=None, progressInterval=5.0):
+		"""
+		Como calculate con full, pero el LargestJob devuelto reúne también los count archivos y las count carpetas más grandes del árbol.
+		"""
+		return self._start(LargestJob(os.path.normpath(path), count), onProgress, onFinished, progressInterval)
+
+	def _start(self, job, onProgress, onFinished, progressInterval):
+		thread = threading.Thread(
+			target=self._run, args=(job, onProgress, onFinished, progressInterval),
+			name="virtualExplorerFolderSize", daemon=True
+		)
+		thread.start()
+		return job
+
+	def _run(self, job, onProgress, onFinished, progressInterval):
+		try:
+			# Calculations of overlapping trees would overwrite each other's rows, so they run one at a time.
+			with self._lock:
+				connection = database.connectCache(self.path, SCHEMA_VERSION, _SCHEMA, _DROP_SCHEMA)
+				try:
+					self._calculate(connection, job, onProgress, progressInterval)
+				finally:
+					connection.close()
+			job.status = SizeJob.CANCELLED if job.cancelled else SizeJob.DONE
+		except Exception as e:
+			job.status = SizeJob.FAILED
+			job.error = e
+		if onFinished:
+			onFinished(job)
+
+	def _calculate(self, connection, job, onProgress, progressInterval):
+		root = job.path
+		# Every folder under root sorts between root + sep and root + the next character after sep.
+		low, high = root.rstrip(os.sep) + os.sep, root.rstrip(os.sep) + chr(ord(os.sep) + 1)
+		topFiles = job.count if isinstance(job, LargestJob) else 0
+		known = {}
+		children = {}
+		for path, parent, mtime, size, files in connection.execute(
+			"select path, parent, mtime, bytes, files from directories where path=? or (path>=? and path<?)", (root, low, high)
+		):
+			known[path] = (mtime, size, files)
+			children.setdefault(parent, []).append(path)
+		visited = set()
+		updates = []
+		lastReport = time.monotonic()
+		with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="virtualExplorerFolderSizeWalk") as executor:
+			pending = {executor.submit(self._scanDirectory, root, known.get(root), children, job.full, topFiles)}
+			try:
+				while pending:
+					done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+					if job.cancelled:
+						break
+					for future in done:
+						path, mtime, size, files, subdirectories, changed, largestFiles = future.result()
+						if mtime is None:
+							if path == root:
+								# Nothing can be counted, so the job fails with the reason instead of reporting an empty folder.
+								with os.scandir(root):
+									pass
+							# Folders we cannot read are left out of the total.
+							job.skipDirectory(path)
+							continue
+						visited.add(path)
+						job.addDirectory(path, size, files, subdirectories, largestFiles)
+						if changed:
+							updates.append((path, os.path.dirname(path), mtime, size, files))
+						else:
+							job.cachedFolders += 1
+						for subdirectory in subdirectories:
+							pending.add(executor.submit(self._scanDirectory, subdirectory, known.get(subdirectory), children, job.full, topFiles))
+					now = time.monotonic()
+					if onProgress and now - lastReport >= progressInterval:
+						lastReport = now
+						onProgress(job)
+			finally:
+				for future in pending:
+					future.cancel()
+		# Every folder read is valid on its own, so even a cancelled calculation leaves its work for the next one.
+		with connection:
+			connection.executemany("insert or replace into directories(path, parent, mtime, bytes, files) values(?, ?, ?, ?, ?)", updates)
+			if not job.cancelled:
+				# Folders that no longer exist.
+				connection.executemany("delete from directories where path=?", ((path,) for path in known if path not in visited))
+
+	@staticmethod
+	def _scanDirectory(path, cached, children, full=False, topFiles=0):
+		"""
+		Suma los archivos que están directamente en la carpeta y devuelve sus subcarpetas, y si topFiles no es 0, sus topFiles archivos más grandes. Si la fecha de modificación coincide con la guardada y no se pide full, usa lo guardado sin listarla. Una carpeta que no se puede leer se devuelve con mtime None.
+		"""
+		try:
+			mtime = os.stat(path).st_mtime
+			if cached is not None and cached[0] == mtime and not full:
+				return path, mtime, cached[1], cached[2], children.get(path, ()), False, ()
+			size = 0
+			files = 0
+			subdirectories = []
+			largestFiles = []
+			with os.scandir(path) as entries:
+				for entry in entries:
+					try:
+						if entry.is_dir(follow_symlinks=False):
+							# Symbolic links to folders are not followed.
+							subdirectories.append(entry.path)
+						else:
+							fileSize = entry.stat(follow_symlinks=False).st_size
+							size += fileSize
+							files += 1
+							if topFiles:
+								_keepLargest(largestFiles, (fileSize, entry.path), topFiles)
+					except OSError:
+						continue
+		except OSError:
+			return path, None, 0, 0, (), False, ()
+		# A folder listed again with the same contents needs no new row.
+		changed = cached is None or cached[0] != mtime or cached[1] != size or cached[2] != files
+		return path, mtime, size, files, subdirectories, changed, largestFiles
@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Utilidades para listar el contenido de las carpetas de forma progresiva, sin esperar a recorrer la carpeta completa.
+"""
+
+import fnmatch
+import os
+import re
+import stat
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# The first chunk is small so the first entry can be spoken right away; later chunks are bigger to reduce overhead.
+FIRST_CHUNK_SIZE = 64
+CHUNK_SIZE = 1024
+
+# Seconds for which the sizes and dates of a cached listing are used to sort it. A file can grow without changing its folder's mtime.
+STAT_MAX_AGE = 30.0
+
+# Type flags stored per entry, taken from os.scandir without an extra stat.
+FILE = 0
+DIRECTORY = 1
+
+# Sort modes of a listing, in the order the user cycles through them.
+SORT_MODES = ("name", "modified", "size", "type", "foldersFirst")
+
+_DIGITS = re.compile(r"\d+")
+
+# Kinds of entries a filter can keep.
+KINDS = ("all", "files", "folders")
+_HIDDEN_ATTRIBUTES = stat.FILE_ATTRIBUTE_HIDDEN | stat.FILE_ATTRIBUTE_SYSTEM
+
+
+def _encodeNumber(match):
+	digits = match.group().lstrip("0") or "0"
+	# Prefixed with its number of digits, a shorter number always sorts first.
+	return f"{len(digits):02d}{digits}"
+
+
+def naturalKey(name):
+	"""
+	Clave de orden natural: sin distinguir mayúsculas y comparando los números por su valor, de modo que "archivo 2" va antes que "archivo 10". Es una cadena, que se compara mucho más rápido que una lista de partes.
+	"""
+	return _DIGITS.sub(_encodeNumber, name.casefold())
+
+
+def _extension(name):
+	dot = name.rfind(".")
+	# A leading dot starts a hidden name, not an extension.
+	return name[dot:].casefold() if dot > 0 else ""
+
+
+class Entries:
+	"""
+	Elementos de una carpeta guardados por columnas: nombre, tipo, tamaño y fecha de modificación, tomados de os.scandir. También guarda el orden ya calculado para cada modo.
+	"""
+
+	__slots__ = ("names", "flags", "sizes", "mtimes", "orders")
+
+	def __init__(self):
+		self.names = []
+		self.flags = bytearray()
+		# Folders store -1 as their size.
+		self.sizes = array("q")
+		self.mtimes = array("d")
+		# sort mode -> positions in that order, computed once per mode.
+		self.orders = {}
+
+	def append(self, entry):
+		self.names.append(entry.name)
+		try:
+			# On Windows scandir already read these attributes, so neither call touches the disk.
+			isDirectory = entry.is_dir()
+			stat = entry.stat(follow_symlinks=False)
+			size, mtime = -1 if isDirectory else stat.st_size, stat.st_mtime
+		except OSError:
+			isDirectory, size, mtime = False, 0, 0.0
+		# True and False store as DIRECTORY and FILE.
+		self.flags.append(isDirectory)
+		self.sizes.append(size)
+		self.mtimes.append(mtime)
+
+	def extend(self, other):
+		self.names.extend(other.names)
+		self.flags.extend(other.flags)
+		self.sizes.extend(other.sizes)
+		self.mtimes.extend(other.mtimes)
+
+	def __len__(self):
+		return len(self.names)
+
+	def _sort(self, mode):
+		flags, sizes, mtimes = self.flags, self.sizes, self.mtimes
+		if mode == "modified":
+			# Newest first; a reversed sort keeps equal entries in scan order.
+			return sorted(range(len(mtimes)), key=mtimes.__getitem__, reverse=True)
+		if mode == "size":
+			# Largest files first, folders (-1) last.
+			return sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True)
+		if mode == "name":
+			# The only mode that needs the natural keys; they are built once, and dropped once the order is known.
+			keys = [naturalKey(name) for name in self.names]
+			return sorted(range(len(keys)), key=keys.__getitem__)
+		# The other modes regroup the name order, so entries within a group stay sorted by name.
+		byName = self.sortedOrder("name")
+		if mode == "foldersFirst":
+			return [i for i in byName if flags[i] == DIRECTORY] + [i for i in byName if flags[i] != DIRECTORY]
+		# "type": folders first, then by extension; Python's sort is stable.
+		names = self.names
+		keys = [("1" if flag != DIRECTORY else "0") + _extension(name) for name, flag in zip(names, flags)]
+		return sorted(byName, key=keys.__getitem__)
+
+	def sortedOrder(self, mode):
+		"""
+		Devuelve las posiciones de los elementos en el orden del modo indicado. Solo usa los datos ya guardados, sin llamadas al sistema, y el resultado se reutiliza mientras no cambie el número de elementos. El orden por nombre es la base de los demás, así que las claves naturales solo se calculan una vez.
+		"""
+		order = self.orders.get(mode)
+		if order is None or len(order) != len(self.names):
+			order = array("L", self._sort(mode))
+			self.orders[mode] = order
+		return order
+
+
+class EntryFilter:
+	"""
+	Filtro de un nivel. El texto admite patrones glob y extensiones (".log") separados por espacios o punto y coma; un elemento se muestra si coincide con alguno. También puede ocultar los elementos ocultos, de sistema o que empiezan con punto, y mostrar solo archivos o solo carpetas.
+	"""
+
+	def __init__(self, text="", hideHidden=False, kind="all"):
+		self.text = text.strip()
+		self.hideHidden = hideHidden
+		self.kind = kind
+		tokens = [token.casefold() for token in self.text.replace(";", " ").split()]
+		self.extensions = frozenset(token for token in tokens if token.startswith(".") and not any(c in token for c in "*?["))
+		patterns = [token for token in tokens if token not in self.extensions]
+		# All globs are compiled into a single expression, matched against the case-folded name.
+		self._match = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns)).match if patterns else None
+
+	@property
+	def active(self):
+		return bool(self.text) or self.hideHidden or self.kind != "all"
+
+	def matches(self, entry):
+		"""
+		Indica si el elemento de os.scandir pasa el filtro. Usa los datos que scandir ya leyó, que DirEntry guarda para el resto del listado.
+		"""
+		name = entry.name
+		try:
+			if self.hideHidden and (name.startswith(".") or getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0) & _HIDDEN_ATTRIBUTES):
+				return False
+			if self.kind != "all" and entry.is_dir() != (self.kind == "folders"):
+				return False
+		except OSError:
+			return False
+		if not self.extensions and self._match is None:
+			return True
+		folded = name.casefold()
+		return os.path.splitext(folded)[1] in self.extensions or (self._match is not None and self._match(folded) is not None)
+
+
+def readMetadata(path):
+	"""
+	Devuelve (es carpeta, tamaño, fecha de modificación) de la ruta con un único stat, en el mismo formato que DirectoryLevel.metadata.
+	"""
+	result = os.stat(path)
+	isDirectory = stat.S_ISDIR(result.st_mode)
+	return isDirectory, -1 if isDirectory else result.st_size, result.st_mtime
+
+
+def iterChunks(path, firstChunkSize=FIRST_CHUNK_SIZE, chunkSize=CHUNK_SIZE, entryFilter=None):
+	"""
+	Generador que recorre la carpeta con os.scandir y devuelve sus elementos en pares (bloque de tipo Entries, es el último). Un bloque lleno se entrega al leer el elemento siguiente, así el último siempre se reconoce. Con entryFilter, los elementos que no pasan el filtro se descartan sin guardarse.
+	"""
+	if entryFilter is not None and not entryFilter.active:
+		entryFilter = None
+	chunk = Entries()
+	limit = firstChunkSize
+	with os.scandir(path) as entries:
+		for entry in entries:
+			if entryFilter is not None and not entryFilter.matches(entry):
+				continue
+			if len(chunk) >= limit:
+				# Another entry follows, so this chunk is not the last one.
+				yield chunk, False
+				chunk = Entries()
+				limit = chunkSize
+			chunk.append(entry)
+	if len(chunk):
+		yield chunk, True
+
+
+class DirectoryLevel:
+	"""
+	Nivel de navegación que representa el contenido de una carpeta y que se va llenando por bloques mientras se recorre. Guarda la carpeta una sola vez junto con los datos de cada elemento; las rutas completas se construyen al pedir un elemento.
+	"""
+
+	def __init__(self, path, entryFilter=None):
+		self.path = path
+		# EntryFilter applied while scanning, None to show everything.
+		self.filter = entryFilter if entryFilter is not None and entryFilter.active else None
+		# Level this one replaces on the stack once its first entries arrive, when a filter is changed.
+		self.replaces = None
+		self.entries = Entries()
+		# Positions of the entries in display order, None while they are shown in scan order.
+		self.order = None
+		# True once the scan has finished, successfully or not.
+		self.complete = False
+		# True once the level has been pushed onto the navigation stack.
+		self.pushed = False
+		# Set from the main thread when the level is discarded so the scan can stop early.
+		self.cancelled = False
+		# time.monotonic() at which ListingCache stored the entries, None when they were read for this visit.
+		self.cachedAt = None
+
+	def hasFreshStats(self, maxAge=STAT_MAX_AGE):
+		"""
+		Indica si los tamaños y fechas del nivel se pueden usar sin consultar el disco: se leyeron en esta visita o se guardaron en la caché hace menos de maxAge segundos.
+		"""
+		return self.cachedAt is None or time.monotonic() - self.cachedAt <= maxAge
+
+	@property
+	def names(self):
+		"""
+		Nombres de los elementos en el orden en que se muestran.
+		"""
+		if self.order is None:
+			return self.entries.names
+		names = self.entries.names
+		return [names[i] for i in self.order]
+
+	def extend(self, chunk):
+		self.entries.extend(chunk)
+
+	def _position(self, index):
+		# Display position -> position in entries.
+		return index if self.order is None else self.order[index]
+
+	def setOrder(self, order):
+		"""
+		Aplica un orden de visualización calculado con Entries.sortedOrder. Devuelve False si ya no corresponde al contenido del nivel.
+		"""
+		if order is not None and len(order) != len(self.entries):
+			return False
+		self.order = order
+		return True
+
+	def index(self, value):
+		"""
+		Devuelve la posición de la ruta completa indicada; lanza ValueError si no pertenece al nivel.
+		"""
+		if not value:
+			raise ValueError(value)
+		directory, name = os.path.split(value)
+		if os.path.normcase(directory) != os.path.normcase(self.path):
+			raise ValueError(value)
+		return self.displayIndex(self.entries.names.index(name))
+
+	def displayIndex(self, position):
+		"""
+		Convierte una posición de entries en la posición que ocupa en pantalla.
+		"""
+		return position if self.order is None else self.order.index(position)
+
+	def isDirectory(self, index):
+		return self.entries.flags[self._position(index)] == DIRECTORY
+
+	def metadata(self, index):
+		"""
+		Devuelve (es carpeta, tamaño, fecha de modificación) del elemento a partir de lo guardado al listar, sin acceder al disco. Si el nivel salió de la caché, estos datos pueden estar desactualizados.
+		"""
+		position = self._position(index)
+		entries = self.entries
+		return entries.flags[position] == DIRECTORY, entries.sizes[position], entries.mtimes[position]
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __getitem__(self, index):
+		return os.path.join(self.path, self.entries.names[self._position(index)])
+
+	def __iter__(self):
+		return (self[index] for index in range(len(self)))
+
+
+class ListingCache:
+	"""
+	Caché LRU de listados de carpetas. Cada entrada se valida con la fecha de modificación de la carpeta, de modo que volver a una carpeta visitada cuesta un solo stat.
+	"""
+
+	def __init__(self, maxEntries=32, maxBytes=64 * 1024 * 1024):
+		self.maxEntries = maxEntries
+		self.maxBytes = maxBytes
+		# path -> (mtime_ns, Entries, size estimate, time stored), least recently used first.
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+		self.currentBytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	@staticmethod
+	def getMtime(path):
+		return os.stat(path).st_mtime_ns
+
+	@staticmethod
+	def _estimateSize(items):
+		columns = (items.names, items.flags, items.sizes, items.mtimes)
+		return sum(sys.getsizeof(column) for column in columns) + sum(sys.getsizeof(name) for name in items.names)
+
+	def get(self, path, maxAge=None):
+		"""
+		Devuelve el listado guardado para la carpeta si sigue vigente, o None si no existe o la carpeta cambió. Con maxAge, también se descarta si se guardó hace más de maxAge segundos.
+		"""
+		try:
+			mtime = self.getMtime(path)
+		except OSError:
+			mtime = None
+		with self._lock:
+			entry = self._entries.get(path)
+			if entry is None or mtime is None or entry[0] != mtime or (maxAge is not None and time.monotonic() - entry[3] > maxAge):
+				if entry is not None:
+					self._remove(path)
+				self.misses += 1
+				return None
+			self._entries.move_to_end(path)
+			self.hits += 1
+			return entry[1]
+
+	def storedAt(self, path):
+		"""
+		Devuelve el time.monotonic() en que se guardó el listado de la carpeta, o None si no está en la caché.
+		"""
+		with self._lock:
+			entry = self._entries.get(path)
+		return None if entry is None else entry[3]
+
+	def isFresh(self, path):
+		"""
+		Indica si hay un listado vigente para la carpeta, sin alterar los contadores ni el orden LRU.
+		"""
+		with self._lock:
+			entry = self._entries.get(path)
+		if entry is None:
+			return False
+		try:
+			return entry[0] == self.getMtime(path)
+		except OSError:
+			return False
+
+	def put(self, path, mtime, items):
+		"""
+		Guarda el listado (Entries) de la carpeta con la fecha de modificación que tenía antes de recorrerla.
+		"""
+		if self.maxEntries <= 0:
+			return
+		size = self._estimateSize(items)
+		if size > self.maxBytes:
+			return
+		with self._lock:
+			if path in self._entries:
+				self._remove(path)
+			self._entries[path] = (mtime, items, size, time.monotonic())
+			self.currentBytes += size
+			while len(self._entries) > self.maxEntries or self.currentBytes > self.maxBytes:
+				self._remove(next(iter(self._entries)))
+				self.evictions += 1
+
+	def invalidate(self, path):
+		with self._lock:
+			if path in self._entries:
+				self._remove(path)
+
+	def _remove(self, path):
+		self.currentBytes -= self._entries.pop(path)[2]
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __repr__(self):
+		return f"ListingCache(entries={len(self)}, bytes={self.currentBytes}, hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+
+class Prefetcher:
+	"""
+	Precarga en segundo plano, con baja prioridad, los listados de las carpetas enfocadas para que entrar en ellas sea inmediato.
+	"""
+
+	def __init__(self, cache, maxPending=2):
+		self.cache = cache
+		self.maxPending = maxPending
+		# A single worker keeps prefetching from competing with listings the user asked for.
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="virtualExplorerPrefetch")
+		self._pending = {}
+		self._lock = threading.Lock()
+		# Bumped on every new request; running prefetches stop as soon as they notice a newer one.
+		self._generation = 0
+
+	def prefetch(self, paths):
+		"""
+		Reemplaza las precargas pendientes por las de las rutas indicadas, en orden de prioridad.
+		"""
+		self.cancel()
+		if self.maxPending <= 0:
+			return
+		generation = self._generation
+		submitted = []
+		with self._lock:
+			for path in paths:
+				if len(self._pending) >= self.maxPending:
+					break
+				if path in self._pending:
+					continue
+				future = self._executor.submit(self._warm, path, generation)
+				self._pending[path] = future
+				submitted.append((path, future))
+		# Callbacks of futures that are already done run immediately, so they are added outside the lock.
+		for path, future in submitted:
+			future.add_done_callback(lambda f, path=path: self._discard(path, f))
+
+	def cancel(self):
+		self._generation += 1
+		with self._lock:
+			futures = list(self._pending.values())
+		for future in futures:
+			future.cancel()
+
+	def shutdown(self):
+		self.cancel()
+		self._executor.shutdown(wait=False)
+
+	def _discard(self, path, future):
+		with self._lock:
+			if self._pending.get(path) is future:
+				del self._pending[path]
+
+	def _warm(self, path, generation):
+		if generation != self._generation:
+			return
+		try:
+			if not os.path.isdir(path) or self.cache.isFresh(path):
+				return
+			mtime = self.cache.getMtime(path)
+			items = Entries()
+			for chunk, last in iterChunks(path, chunkSize=CHUNK_SIZE):
+				if generation != self._generation:
+					return
+				items.extend(chunk)
+			self.cache.put(path, mtime, items)
+		except OSError:
+			pass
+
+
+def listDirectory(path, cache=None, entryFilter=None):
+	"""
+	Devuelve el listado completo (Entries) de la carpeta, usando la caché cuando es posible. La caché solo guarda listados sin filtrar.
+	"""
+	if entryFilter is not None and entryFilter.active:
+		items = Entries()
+		for chunk, last in iterChunks(path, chunkSize=CHUNK_SIZE, entryFilter=entryFilter):
+			items.extend(chunk)
+		return items
+	if cache is not None:
+		items = cache.get(path)
+		if items is not None:
+			return items
+		mtime = cache.getMtime(path)
+	items = Entries()
+	for chunk, last in iterChunks(path, chunkSize=CHUNK_SIZE):
+		items.extend(chunk)
+	if cache is not None:
+		cache.put(path, mtime, items)
+	return items
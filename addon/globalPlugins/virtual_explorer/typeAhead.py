@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Índice ordenado de los nombres de un nivel de navegación, usado por la búsqueda rápida para saltar al elemento que empieza con lo escrito.
+"""
+
+from bisect import bisect_left
+
+# Sorts after any character a name can contain, so prefix + _MAX_CHAR bounds every name starting with prefix.
+_MAX_CHAR = "\U0010ffff"
+
+
+class PrefixIndex:
+	"""
+	Nombres de un nivel ordenados sin distinguir mayúsculas, junto con su posición original, para buscar prefijos mediante búsqueda binaria.
+	"""
+
+	def __init__(self, names):
+		pairs = sorted((name.casefold(), position) for position, name in enumerate(names))
+		self.keys = [key for key, position in pairs]
+		self.positions = [position for key, position in pairs]
+		# position -> rank in keys, to continue cycling from the current item.
+		self.ranks = [0] * len(pairs)
+		for rank, position in enumerate(self.positions):
+			self.ranks[position] = rank
+
+	def __len__(self):
+		return len(self.keys)
+
+	def find(self, prefix, current=-1, cycle=False):
+		"""
+		Devuelve la posición del primer nombre que empieza con prefix, o None si no hay ninguno. Si el elemento actual ya coincide se conserva, salvo con cycle, que pasa al siguiente que coincida.
+		"""
+		prefix = prefix.casefold()
+		low = bisect_left(self.keys, prefix)
+		high = bisect_left(self.keys, prefix + _MAX_CHAR, low)
+		if low == high:
+			return None
+		if 0 <= current < len(self.ranks) and low <= self.ranks[current] < high:
+			if not cycle:
+				# The current item still matches the longer prefix, stay on it.
+				return current
+			rank = self.ranks[current] + 1
+			return self.positions[rank if rank < high else low]
+		return self.positions[low]
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Compara el motor de copia del complemento con shutil.copytree sobre árboles sintéticos: muchos archivos pequeños y pocos archivos enormes.
+
+Uso: python benchmarks/copy_benchmark.py [--small-files N] [--huge-files N] [--huge-size-mb N] [--dir RUTA]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "addon", "globalPlugins", "virtual_explorer"))
+import fileOperations  # noqa: E402
+
+
+def makeSmallTree(root, count, size=4096, perDirectory=500):
+	payload = os.urandom(size)
+	for i in range(count):
+		directory = os.path.join(root, f"d{i // perDirectory:04d}")
+		os.makedirs(directory, exist_ok=True)
+		with open(os.path.join(directory, f"f{i:06d}.bin"), "wb") as f:
+			f.write(payload)
+
+
+def makeHugeTree(root, count, sizeMB):
+	os.makedirs(root, exist_ok=True)
+	block = os.urandom(1024 * 1024)
+	for i in range(count):
+		with open(os.path.join(root, f"huge{i}.bin"), "wb") as f:
+			for _ in range(sizeMB):
+				f.write(block)
+
+
+def timeShutil(source, destination):
+	start = time.perf_counter()
+	shutil.copytree(source, destination)
+	return time.perf_counter() - start
+
+
+def timeEngine(source, destination, copyThreads):
+	finished = threading.Event()
+	operations = fileOperations.FileOperationQueue(onFinished=lambda job: finished.set(), copyThreads=copyThreads)
+	start = time.perf_counter()
+	job = operations.submit(fileOperations.FileJob(fileOperations.COPY, source, destination))
+	finished.wait()
+	elapsed = time.perf_counter() - start
+	operations.shutdown()
+	if job.status != fileOperations.FileJob.DONE:
+		raise RuntimeError(f"copy failed: {job.status} {job.error}")
+	return elapsed
+
+
+def run(name, source, workdir, copyThreads):
+	shutilTime = timeShutil(source, os.path.join(workdir, f"{name}_shutil"))
+	engineTime = timeEngine(source, os.path.join(workdir, f"{name}_engine"), copyThreads)
+	print(f"{name:>6}: shutil.copytree {shutilTime:8.3f}s | engine ({copyThreads} threads) {engineTime:8.3f}s | speedup x{shutilTime / engineTime:.2f}")
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--small-files", type=int, default=5000)
+	parser.add_argument("--huge-files", type=int, default=3)
+	parser.add_argument("--huge-size-mb", type=int, default=256)
+	parser.add_argument("--threads", type=int, default=4)
+	parser.add_argument("--dir", default=None, help="Carpeta de trabajo; por defecto una carpeta temporal.")
+	args = parser.parse_args()
+
+	workdir = tempfile.mkdtemp(prefix="ve_copy_bench_", dir=args.dir)
+	try:
+		small = os.path.join(workdir, "small_src")
+		huge = os.path.join(workdir, "huge_src")
+		makeSmallTree(small, args.small_files)
+		makeHugeTree(huge, args.huge_files, args.huge_size_mb)
+		kernelCopy = [name for name in ("copy_file_range", "sendfile") if hasattr(os, name)]
+		print(f"Kernel-side copy available: {', '.join(kernelCopy) or 'none (buffered fallback)'}")
+		run("small", small, workdir, args.threads)
+		run("huge", huge, workdir, args.threads)
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Mide con python -X importtime cuánto tarda en importarse cada módulo del complemento que no depende de NVDA, y cuánto tarda en resolverse sqlite3 la primera vez que se usa.
+
+Uso: python benchmarks/import_benchmark.py [--runs N] [--max-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "addon", "globalPlugins", "virtual_explorer")
+PACKAGE = "virtual_explorer"
+# Modules that can be imported without NVDA; __init__ and dialog need NVDA itself.
+MODULES = ("database", "favoritesIO", "fileIndex", "fileOperations", "folderSize", "listing", "typeAhead")
+
+# The package is registered without running its __init__, which imports NVDA modules.
+_SCRIPT = """
+import sys, time, types
+package = types.ModuleType({package!r})
+package.__path__ = [{directory!r}]
+sys.modules[{package!r}] = package
+start = time.perf_counter()
+{imports}
+print("total", (time.perf_counter() - start) * 1e6, "-")
+start = time.perf_counter()
+{package}.database.loadSqlite3()
+print("sqlite3", (time.perf_counter() - start) * 1e6, {package}.database.sqlite3.__file__)
+"""
+
+
+def measure():
+	"""
+	Importa los módulos en un intérprete nuevo y devuelve, en microsegundos, el tiempo acumulado de cada uno, el total y el de resolver sqlite3, además del sqlite3 elegido.
+	"""
+	script = _SCRIPT.format(
+		package=PACKAGE,
+		directory=os.path.abspath(PACKAGE_DIR),
+		imports="\n".join(f"import {PACKAGE}.{module}" for module in MODULES)
+	)
+	result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, check=True)
+	times = {}
+	for line in result.stderr.splitlines():
+		# Format: "import time: self [us] | cumulative | imported package"
+		if not line.startswith("import time:") or "|" not in line:
+			continue
+		fields = [field.strip() for field in line[len("import time:"):].split("|")]
+		name = fields[2]
+		if name.startswith(f"{PACKAGE}.") and fields[1].isdigit():
+			times[name[len(PACKAGE) + 1:]] = int(fields[1])
+	totalLine, sqliteLine = result.stdout.splitlines()
+	total = float(totalLine.split()[1])
+	name, sqliteTime, backend = sqliteLine.split(maxsplit=2)
+	return times, total, float(sqliteTime), backend
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--max-ms", type=float, default=None, help="Falla si la importación de todos los módulos supera este tiempo.")
+	args = parser.parse_args()
+
+	runs = [measure() for _ in range(args.runs)]
+	print(f"sqlite3 backend: {runs[0][3]}")
+	# Medians over fresh interpreters; cumulative times include the modules each one imports.
+	for module in MODULES:
+		median = statistics.median(times.get(module, 0) for times, total, sqliteTime, backend in runs)
+		print(f"{module:>16}: {median / 1000:8.2f} ms")
+	total = statistics.median(total for times, total, sqliteTime, backend in runs)
+	print(f"{'total':>16}: {total / 1000:8.2f} ms")
+	print(f"{'first sqlite3':>16}: {statistics.median(sqliteTime for times, total, sqliteTime, backend in runs) / 1000:8.2f} ms")
+	if args.max_ms is not None and total / 1000 > args.max_ms:
+		print(f"Import time over the limit of {args.max_ms} ms")
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
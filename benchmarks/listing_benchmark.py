@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Compara el tiempo y la memoria de un nivel de navegación guardado como rutas completas con el DirectoryLevel compacto (carpeta una vez, más nombres y tipos) sobre una carpeta sintética.
+
+Uso: python benchmarks/listing_benchmark.py [--files N] [--dir RUTA]
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "addon", "globalPlugins", "virtual_explorer"))
+import listing  # noqa: E402
+
+
+def makeFolder(root, count):
+	# A realistic parent prefix, repeated by every full path.
+	folder = os.path.join(root, "Users", "someone", "Documents", "Projects", "archive", "exported files")
+	os.makedirs(folder)
+	for i in range(count):
+		open(os.path.join(folder, f"document_{i:06d}.txt"), "wb").close()
+	return folder
+
+
+def fullPaths(folder):
+	items = []
+	for chunk in iterPathChunks(folder):
+		items.extend(chunk)
+	return items
+
+
+def iterPathChunks(folder):
+	# The previous layout: one absolute path string per entry.
+	chunk = []
+	with os.scandir(folder) as entries:
+		for entry in entries:
+			chunk.append(entry.path)
+			if len(chunk) >= listing.CHUNK_SIZE:
+				yield chunk
+				chunk = []
+	if chunk:
+		yield chunk
+
+
+def compactLevel(folder):
+	level = listing.DirectoryLevel(folder)
+	for chunk, last in listing.iterChunks(folder):
+		level.extend(chunk)
+	return level
+
+
+def measure(function, folder, repeat):
+	best = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		function(folder)
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	gc.collect()
+	tracemalloc.start()
+	result = function(folder)
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del result
+	return best, size
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--files", type=int, default=100000)
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--dir", default=None, help="Carpeta de trabajo; por defecto una carpeta temporal.")
+	args = parser.parse_args()
+
+	workdir = tempfile.mkdtemp(prefix="ve_listing_bench_", dir=args.dir)
+	try:
+		folder = makeFolder(workdir, args.files)
+		pathsTime, pathsBytes = measure(fullPaths, folder, args.repeat)
+		levelTime, levelBytes = measure(compactLevel, folder, args.repeat)
+		print(f"{args.files} entries in {folder}")
+		print(f"  full paths: {pathsTime * 1000:8.1f} ms {pathsBytes / args.files:8.1f} bytes per entry")
+		print(f"  compact:    {levelTime * 1000:8.1f} ms {levelBytes / args.files:8.1f} bytes per entry")
+		print(f"  memory saved: {(1 - levelBytes / pathsBytes) * 100:.0f}%")
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# This file is covered by the GNU General Public License.
+# See the file COPYING.txt for more details.
+
+"""
+Compara la memoria por ruta favorita de las antiguas listas [path, identifier, fixed, category] con el registro Favorite, usando tracemalloc.
+
+Uso: python benchmarks/memory_benchmark.py [--entries N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "addon", "globalPlugins", "virtual_explorer"))
+from favorites import Favorite  # noqa: E402
+
+
+def makeRows(count):
+	# The strings are created up front and shared, so only the per-entry container is measured.
+	return [(f"C:\\Users\\user\\Documents\\folder{i}", f"favorite{i}", i % 2, f"category{i % 10}") for i in range(count)]
+
+
+def measure(rows, build):
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	entries = [build(row) for row in rows]
+	after = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	# The outer list is the same for both layouts; leave it out.
+	return (after - before - sys.getsizeof(entries)) / len(entries)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--entries", type=int, default=100000)
+	args = parser.parse_args()
+
+	rows = makeRows(args.entries)
+	listBytes = measure(rows, list)
+	recordBytes = measure(rows, Favorite.fromRow)
+	print(f"{args.entries} favorites, bytes per entry excluding the shared strings:")
+	print(f"  list:     {listBytes:8.1f}")
+	print(f"  Favorite: {recordBytes:8.1f}")
+	print(f"  saved:    {listBytes - recordBytes:8.1f} ({(1 - recordBytes / listBytes) * 100:.0f}%), {(listBytes - recordBytes) * args.entries / 1024 / 1024:.1f} MB in total")
+
+
+if __name__ == "__main__":
+	main()